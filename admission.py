@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent import futures
+
+import grpc
+
+# Reads are shed first under load; internal cluster RPCs and leader discovery are never limited.
+READ_METHODS = frozenset({"Login", "ListAccounts", "ListMessages", "SyncMessages", "GetBlob", "GetConversation"})
+EXEMPT_METHODS = frozenset({"Heartbeat", "Election", "ReplicateOperation", "JoinCluster",
+                            "GetSnapshot", "GetLeaderInfo", "GetMembership", "WatchMembership", "GetMetrics",
+                            "SetProfiler"})
+USER_FIELDS = ("username", "sender", "user")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst else rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens=1):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+
+class AdmissionExecutor(futures.ThreadPoolExecutor):
+    """Thread pool that tracks how many RPCs are queued or running."""
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers=max_workers)
+        self.pending = 0
+        self.pending_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self.pending_lock:
+            self.pending += 1
+        try:
+            future = super().submit(fn, *args, **kwargs)
+        except Exception:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+        return future
+
+    def _task_done(self, future):
+        with self.pending_lock:
+            self.pending -= 1
+
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """Rejects client RPCs with RESOURCE_EXHAUSTED when the server is overloaded or a caller
+    exceeds its token bucket.
+
+    The in-flight check runs when the call arrives, before it is queued on the executor, so an
+    overloaded server answers immediately instead of growing its queue. Rate limits need the
+    request message and are checked in the worker thread.
+    """
+
+    def __init__(self, config, executor, metrics, clock=time.monotonic):
+        self.executor = executor
+        self.metrics = metrics
+        self.clock = clock
+        self.max_inflight = config.get("max_inflight", 64)
+        self.read_shed_threshold = int(self.max_inflight * config.get("read_shed_ratio", 0.75))
+        self.user_rate = config.get("user_rate")
+        self.user_burst = config.get("user_burst")
+        self.user_method_limits = config.get("user_method_limits", {})
+        self.method_buckets = {method: TokenBucket(limit["rate"], limit.get("burst"), clock)
+                               for method, limit in config.get("method_limits", {}).items()}
+        self.max_tracked_users = config.get("max_tracked_users", 10000)
+        self.user_buckets = OrderedDict()
+        self.user_buckets_lock = threading.Lock()
+        self.open_streams = 0
+        self.open_streams_lock = threading.Lock()
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        if handler is not None and handler.unary_stream is not None:
+            return self.tracking_stream(handler)
+        if handler is None or handler.unary_unary is None or method in EXEMPT_METHODS:
+            return handler
+        reason = self.check_capacity(method)
+        if reason:
+            behavior = self.rejecting(method, reason)
+        else:
+            behavior = self.rate_limited(method, handler.unary_unary)
+        return grpc.unary_unary_rpc_method_handler(
+            behavior,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
+
+    def check_capacity(self, method):
+        # Long-lived streams (e.g. WatchMembership) hold a thread but are not queued work.
+        pending = self.executor.pending - self.open_streams
+        self.metrics.set("admission_pending", pending)
+        if method in READ_METHODS and pending >= self.read_shed_threshold:
+            return "read_shed"
+        if pending >= self.max_inflight:
+            return "overloaded"
+        return None
+
+    def check_rate(self, method, request):
+        username = next((getattr(request, f) for f in USER_FIELDS if getattr(request, f, "")), "")
+        if username:
+            if self.user_rate and not self.user_bucket(username, self.user_rate, self.user_burst).try_acquire():
+                return "user_rate"
+            limit = self.user_method_limits.get(method)
+            if limit and not self.user_bucket((username, method), limit["rate"], limit.get("burst")).try_acquire():
+                return "user_method_rate"
+        bucket = self.method_buckets.get(method)
+        if bucket and not bucket.try_acquire():
+            return "method_rate"
+        return None
+
+    def user_bucket(self, key, rate, burst):
+        # LRU-bounded so a flood of distinct usernames cannot grow memory without limit.
+        with self.user_buckets_lock:
+            bucket = self.user_buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst, self.clock)
+                self.user_buckets[key] = bucket
+                if len(self.user_buckets) > self.max_tracked_users:
+                    self.user_buckets.popitem(last=False)
+            else:
+                self.user_buckets.move_to_end(key)
+            return bucket
+
+    def reject(self, context, method, reason):
+        self.metrics.inc("admission_rejected_total", {"method": method, "reason": reason})
+        context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, f"Request rejected ({reason}); retry later")
+
+    def rejecting(self, method, reason):
+        def behavior(request, context):
+            self.reject(context, method, reason)
+        return behavior
+
+    def rate_limited(self, method, behavior):
+        def wrapper(request, context):
+            reason = self.check_rate(method, request)
+            if reason:
+                self.reject(context, method, reason)
+            self.metrics.inc("admission_accepted_total", {"method": method})
+            return behavior(request, context)
+        return wrapper
+
+    def tracking_stream(self, handler):
+        def wrapper(request, context):
+            with self.open_streams_lock:
+                self.open_streams += 1
+            try:
+                yield from handler.unary_stream(request, context)
+            finally:
+                with self.open_streams_lock:
+                    self.open_streams -= 1
+        return grpc.unary_stream_rpc_method_handler(
+            wrapper,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
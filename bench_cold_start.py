@@ -0,0 +1,97 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+import replicated_server
+from cluster_harness import FAST_CONFIG, free_port
+
+# Every node runs in this process through create_server(), the same path tests and embedders use.
+
+
+def import_time(module, repeat):
+    # A fresh interpreter per sample, so nothing is already imported.
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def cold_start(size, workdir, timeout=30):
+    """Starts a `size`-node cluster and sends one write; returns phase durations in seconds."""
+    addresses = [f"127.0.0.1:{free_port()}" for _ in range(size)]
+    nodes = []
+    phases = {}
+    start = time.perf_counter()
+    try:
+        for index, address in enumerate(addresses, start=1):
+            host, port = address.split(":")
+            config = dict(FAST_CONFIG, server_id=index, server_host=host, server_port=int(port),
+                          replica_addresses=addresses, initial_leader=index == 1,
+                          db_file=os.path.join(workdir, f"chat_{index}.db"))
+            nodes.append(replicated_server.create_server(config))
+        phases["create"] = time.perf_counter() - start
+
+        for server, service in nodes:
+            replicated_server.start_server(server, service)
+        phases["start"] = time.perf_counter() - start
+
+        # Ready once every follower has accepted a heartbeat from node 1.
+        deadline = time.time() + timeout
+        while any(service.current_leader_address != addresses[0] for _, service in nodes[1:]):
+            if time.time() > deadline:
+                raise TimeoutError("Followers did not receive a heartbeat")
+            time.sleep(0.001)
+        phases["ready"] = time.perf_counter() - start
+
+        with grpc.insecure_channel(addresses[0]) as channel:
+            stub = chat_pb2_grpc.ChatServiceStub(channel)
+            resp = stub.CreateAccount(chat_pb2.CreateAccountRequest(username="bench", password="pw"), timeout=timeout)
+            if not resp.success:
+                raise RuntimeError(resp.message)
+        phases["first_write"] = time.perf_counter() - start
+    finally:
+        stop_start = time.perf_counter()
+        for server, service in nodes:
+            replicated_server.stop_server(server, service, grace=0)
+        phases["stop"] = time.perf_counter() - stop_start
+    return phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time to import, start and stop a local cluster.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"import replicated_server: {import_time('replicated_server', args.repeat) * 1000:.1f} ms "
+          f"(python -c pass: {import_time('sys', args.repeat) * 1000:.1f} ms)")
+    print(f"import chat_client:       {import_time('chat_client', args.repeat) * 1000:.1f} ms")
+    print()
+    columns = ("create", "start", "ready", "first_write", "stop")
+    print(f"{'nodes':>5} " + " ".join(f"{c + ' ms':>14}" for c in columns))
+    for size in args.sizes:
+        runs = []
+        for _ in range(args.repeat):
+            workdir = tempfile.mkdtemp(prefix="chat_cold_start_")
+            try:
+                runs.append(cold_start(size, workdir))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        # Phases other than stop are cumulative from the first create_server() call.
+        print(f"{size:>5} " + " ".join(f"{statistics.median(r[c] for r in runs) * 1000:>14.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
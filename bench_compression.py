@@ -0,0 +1,73 @@
+import argparse
+import gzip
+import json
+import random
+import string
+import time
+
+import chat_pb2
+import payload_codec
+
+
+def random_text(rng, length):
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(length // 6 + 1)]
+    return " ".join(words)[:length]
+
+
+def build_payloads(num_users, num_messages, body_size, seed):
+    rng = random.Random(seed)
+    users = [f"user_{i}" for i in range(num_users)]
+    accounts = [{"username": u, "password": "%064x" % rng.getrandbits(256)} for u in users]
+    messages = []
+    for i in range(num_messages):
+        messages.append({"id": i + 1, "sender": rng.choice(users), "recipient": rng.choice(users),
+                         "content": random_text(rng, body_size), "read": rng.randint(0, 1),
+                         "timestamp": "03/%02d %02d:%02d" % (rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59))})
+    snapshot = json.dumps({"accounts": accounts, "messages": messages}).encode()
+    replication = json.dumps({"sender": messages[0]["sender"], "recipient": messages[0]["recipient"],
+                              "content": random_text(rng, body_size * 8), "timestamp": messages[0]["timestamp"]}).encode()
+    listing = chat_pb2.ListMessagesResponse(
+        success=True,
+        messages=[f"{m['timestamp']} - From: {m['sender']} - {m['content']}" for m in messages[:1000]]
+    ).SerializeToString()
+    return {"snapshot": snapshot, "replication": replication, "list_response": listing}
+
+
+def measure(data, encoding, repeat):
+    # "grpc-gzip" approximates gRPC message compression, which gzips the serialized message.
+    if encoding == "grpc-gzip":
+        compress, decompress = (lambda d: gzip.compress(d, 6)), gzip.decompress
+    else:
+        compress = lambda d: payload_codec.compress(d, encoding)
+        decompress = lambda d: payload_codec.decompress(d, encoding)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encoded = compress(data)
+    compress_ms = (time.perf_counter() - start) * 1000 / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decompress(encoded)
+    decompress_ms = (time.perf_counter() - start) * 1000 / repeat
+    return len(encoded), compress_ms, decompress_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes-on-wire and CPU cost of payload encodings.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--body_size", type=int, default=120)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.users, args.messages, args.body_size, args.seed)
+    encodings = payload_codec.available_encodings() + ["grpc-gzip"]
+    print(f"{'payload':<14} {'encoding':<10} {'bytes':>10} {'ratio':>7} {'compress ms':>12} {'decompress ms':>14}")
+    for name, data in payloads.items():
+        for encoding in encodings:
+            size, compress_ms, decompress_ms = measure(data, encoding, args.repeat)
+            print(f"{name:<14} {encoding:<10} {size:>10} {size / len(data):>7.3f} {compress_ms:>12.3f} {decompress_ms:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replicated_server.py")
+
+
+def client_loop(address, duration, users, result_queue):
+    # Each client process opens its own connection, so SO_REUSEPORT spreads them over the workers.
+    stub = chat_pb2_grpc.ChatServiceStub(grpc.insecure_channel(address))
+    done = 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        stub.ListMessages(chat_pb2.ListMessagesRequest(username=f"user_{done % users}"), timeout=5)
+        done += 1
+    result_queue.put(done)
+
+
+def seed(stub, users, messages_per_user):
+    for i in range(users):
+        stub.CreateAccount(chat_pb2.CreateAccountRequest(username=f"user_{i}", password="pw"), timeout=5)
+    for i in range(users):
+        for j in range(messages_per_user):
+            stub.SendMessage(chat_pb2.SendMessageRequest(sender=f"user_{(i + 1) % users}", to=f"user_{i}",
+                                                         content=f"message {j}"), timeout=5)
+        stub.ReadNewMessages(chat_pb2.ReadNewMessagesRequest(username=f"user_{i}"), timeout=5)
+
+
+def run(workers, clients, duration, port, users, messages_per_user):
+    address = f"127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, "config.json"), "w") as f:
+            json.dump({"server_id": 1, "server_host": "127.0.0.1", "server_port": port,
+                       "replica_addresses": [address], "initial_leader": True, "workers": workers}, f)
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(SERVER_SCRIPT))
+        proc = subprocess.Popen([sys.executable, SERVER_SCRIPT], cwd=workdir, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            stub = chat_pb2_grpc.ChatServiceStub(grpc.insecure_channel(address))
+            grpc.channel_ready_future(grpc.insecure_channel(address)).result(timeout=10)
+            seed(stub, users, messages_per_user)
+            time.sleep(1)  # Let the read workers finish starting.
+            # Clients are spawned: forking after this process has opened gRPC channels can deadlock.
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            procs = [context.Process(target=client_loop, args=(address, duration, users, queue))
+                     for _ in range(clients)]
+            for p in procs:
+                p.start()
+            total = sum(queue.get() for _ in procs)
+            for p in procs:
+                p.join()
+            return total / duration
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure read throughput of a node for several worker counts.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--port", type=int, default=50151)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--messages_per_user", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'clients':>8} {'reads/s':>10}")
+    for workers in args.workers:
+        rate = run(workers, args.clients, args.duration, args.port, args.users, args.messages_per_user)
+        print(f"{workers:>8} {args.clients:>8} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import time
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+import chat_pb2
+
+# The JSON path is the pre-protobuf encoding: a dict per operation, json.dumps-ed into a
+# string field and dispatched on the operation_type string by the follower. Both paths build
+# and serialize a complete ReplicationRequest, so the timings include the same envelope work.
+
+
+def legacy_request_class():
+    # The old ReplicationRequest (operation_type = 1, data = 2), whose fields chat.proto now
+    # reserves, rebuilt at runtime in its own descriptor pool.
+    file_proto = descriptor_pb2.FileDescriptorProto(name="legacy_replication.proto", package="legacy",
+                                                    syntax="proto3")
+    message = file_proto.message_type.add(name="ReplicationRequest")
+    for number, name in ((1, "operation_type"), (2, "data")):
+        message.field.add(name=name, number=number, type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                          label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("legacy.ReplicationRequest"))
+
+
+LegacyReplicationRequest = legacy_request_class()
+
+
+def make_ops(count, body_size):
+    content = "x" * body_size
+    ops = []
+    for i in range(count):
+        ops.append(("send_message", {"sender": f"user_{i % 50}", "recipient": f"user_{(i + 1) % 50}",
+                                     "content": content, "timestamp": "03/14 12:30"}))
+    return ops
+
+
+def json_encode(ops):
+    # One request per operation, as the old leader sent them.
+    return [LegacyReplicationRequest(operation_type=op_type, data=json.dumps(data)).SerializeToString()
+            for op_type, data in ops]
+
+
+def json_decode(encoded):
+    applied = 0
+    for data in encoded:
+        request = LegacyReplicationRequest.FromString(data)
+        payload = json.loads(request.data)
+        if request.operation_type == "create_account":
+            pass
+        elif request.operation_type == "send_message":
+            applied += len(payload["content"])
+    return applied
+
+
+def proto_encode(ops, batch_size):
+    requests = []
+    for start in range(0, len(ops), batch_size):
+        operations = [chat_pb2.Operation(send_message=chat_pb2.SendMessageOp(
+            sender=d["sender"], recipient=d["recipient"], content=d["content"], timestamp=d["timestamp"]))
+            for _, d in ops[start:start + batch_size]]
+        requests.append(chat_pb2.ReplicationRequest(
+            batch=chat_pb2.OperationBatch(operations=operations)).SerializeToString())
+    return requests
+
+
+def proto_decode(encoded):
+    applied = 0
+    for data in encoded:
+        for op in chat_pb2.ReplicationRequest.FromString(data).batch.operations:
+            if op.WhichOneof("op") == "send_message":
+                applied += len(op.send_message.content)
+    return applied
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and protobuf replication encodings.")
+    parser.add_argument("--ops", type=int, default=10000)
+    parser.add_argument("--body_size", type=int, default=64)
+    parser.add_argument("--batch_size", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ops = make_ops(args.ops, args.body_size)
+    json_encoded, json_enc = timed(lambda: json_encode(ops), args.repeat)
+    _, json_dec = timed(lambda: json_decode(json_encoded), args.repeat)
+    json_bytes = sum(len(d) for d in json_encoded)
+
+    proto_encoded, proto_enc = timed(lambda: proto_encode(ops, args.batch_size), args.repeat)
+    _, proto_dec = timed(lambda: proto_decode(proto_encoded), args.repeat)
+    proto_bytes = sum(len(d) for d in proto_encoded)
+
+    print(f"{args.ops} ops, body {args.body_size} bytes, protobuf batch size {args.batch_size}")
+    print(f"{'encoding':<10} {'bytes':>10} {'encode us/op':>14} {'decode us/op':>14}")
+    for name, size, enc, dec in (("json", json_bytes, json_enc, json_dec),
+                                 ("protobuf", proto_bytes, proto_enc, proto_dec)):
+        print(f"{name:<10} {size:>10} {enc * 1e6 / args.ops:>14.2f} {dec * 1e6 / args.ops:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import json
+import hashlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+from message_cache import MessageCache
+
+GRPC_COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+def load_client_config(path="config_client.json"):
+    with open(path, "r") as config_file:
+        config = json.load(config_file)
+    # Force IPv4: use 127.0.0.1 for  connection
+    host = config.get("client_connect_host", "127.0.0.1")
+    if host == "localhost":
+        host = "127.0.0.1"
+    config["client_connect_host"] = host
+    return config
+
+def create_channel(address, config):
+    # Responses may be gzip/deflate compressed by the server; gRPC negotiates that per call.
+    # Keepalive pings let a dropped connection fail fast.
+    keepalive = config.get("keepalive", {})
+    options = [
+        ("grpc.max_receive_message_length", config.get("max_receive_message_length", 4 * 1024 * 1024)),
+        ("grpc.keepalive_time_ms", keepalive.get("time_ms", 20000)),
+        ("grpc.keepalive_timeout_ms", keepalive.get("timeout_ms", 5000)),
+        ("grpc.keepalive_permit_without_calls", 1 if keepalive.get("permit_without_calls", True) else 0),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+    compression = GRPC_COMPRESSION[config.get("grpc_compression", "none").lower()]
+    return grpc.insecure_channel(address, options=options, compression=compression)
+
+def hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+class ChatClient:
+    """Connection to the cluster leader: leader discovery, retries, membership watch and message caches.
+
+    Has no GUI dependency, so scripts, benchmarks and tests can use it directly; client.py
+    wraps it in the Tk interface.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.rpc_timeout = config.get("rpc_timeout", 1)
+        self.fallback_timeout = config.get("fallback_timeout", 1)
+        self.overall_leader_lookup_timeout = config.get("overall_leader_lookup_timeout", 5)
+        self.retry_delay = config.get("retry_delay", 1)
+        self.heartbeat_interval = config.get("client_heartbeat_interval", 5)
+        # After a server refuses a membership watch, poll for this long before asking again.
+        self.watch_retry_interval = config.get("watch_retry_interval", 60)
+        self.watch_retry_at = 0
+        self.cache_dir = config.get("cache_dir", "client_cache")
+        self.sync_batch_size = config.get("sync_batch_size", 1000)
+        # Characters of long (blob-stored) bodies fetched by a sync; 0 syncs full bodies.
+        self.preview_length = config.get("preview_length", 0)
+        self.conversation_page_size = config.get("conversation_page_size", 50)
+        self.message_caches = {}
+        self.running = False
+
+        # Initial connection to the primary address from the config.
+        self.connect_to_leader(f"{config['client_connect_host']}:{config['client_connect_port']}")
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self.membership_loop, daemon=True).start()
+
+    def close(self):
+        self.running = False
+        self.channel.close()
+        for cache in self.message_caches.values():
+            cache.close()
+        self.message_caches = {}
+
+    def connect_to_leader(self, address):
+        self.leader_address = address
+        self.channel = create_channel(address, self.config)
+        self.stub = chat_pb2_grpc.ChatServiceStub(self.channel)
+        # Membership versions are per server, so a new connection starts from scratch.
+        self.membership_version = 0
+        print(f"Connected to leader at {address}")
+
+    def update_leader(self):
+        fallback = self.config.get("replica_addresses", [])
+        def query_addr(addr):
+            try:
+                channel = create_channel(addr, self.config)
+                stub = chat_pb2_grpc.ChatServiceStub(channel)
+                resp = stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=self.fallback_timeout)
+                return addr, resp
+            except Exception as ex:
+                return addr, None
+
+        with ThreadPoolExecutor(max_workers=max(1, len(fallback))) as executor:
+            futures = {executor.submit(query_addr, addr): addr for addr in fallback}
+            try:
+                for future in as_completed(futures, timeout=self.overall_leader_lookup_timeout):
+                    addr, resp = future.result()
+                    if resp and resp.success and resp.leader_address and resp.leader_address != "Unknown":
+                        print(f"Found leader at {resp.leader_address} via fallback address {addr}")
+                        self.connect_to_leader(resp.leader_address)
+                        new_list = resp.replica_addresses if resp.replica_addresses else []
+                        merged = set(fallback) | set(new_list)
+                        self.config["replica_addresses"] = list(merged)
+                        print(f"[Client Update] New runtime replica list: {self.config['replica_addresses']}")
+                        return
+            except Exception as e:
+                print("Exception during fallback leader lookup:", e)
+        print("Leader lookup failed on all fallback addresses; keeping current connection.")
+        time.sleep(self.retry_delay)
+
+    def call_rpc_with_retry(self, func, request, retries=3):
+        # helper to call an RPC
+        for i in range(retries):
+            try:
+                return func(request, timeout=self.rpc_timeout)
+            except grpc.RpcError as e:
+                if e.code() == grpc.StatusCode.UNAVAILABLE:
+                    print("RPC UNAVAILABLE. Updating leader and retrying...")
+                    self.update_leader()
+                    time.sleep(self.retry_delay)
+                else:
+                    raise
+        raise Exception("RPC failed after retries.")
+
+    def call(self, method, request, retries=3):
+        # Like call_rpc_with_retry, but looks the method up on the current stub on every attempt,
+        # so a retry after a leader change goes to the new leader.
+        return self.call_rpc_with_retry(lambda req, timeout: getattr(self.stub, method)(req, timeout=timeout),
+                                        request, retries)
+
+    def membership_loop(self):
+        # Keeps a watch open so changes are pushed; polls only while the server refuses watches.
+        while self.running:
+            if time.time() >= self.watch_retry_at and self.watch_membership():
+                continue
+            self.refresh_membership()
+            time.sleep(self.heartbeat_interval)
+
+    def watch_membership(self):
+        # Returns False when the server does not take the watch, so the caller polls instead.
+        stub = self.stub
+        try:
+            for update in stub.WatchMembership(chat_pb2.GetMembershipRequest(known_version=self.membership_version)):
+                if self.apply_membership(update):
+                    break
+            return True
+        except grpc.RpcError as e:
+            if not self.running:
+                return True
+            if e.code() in (grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.UNIMPLEMENTED):
+                self.watch_retry_at = time.time() + self.watch_retry_interval
+                return False
+            print("Membership watch failed:", e.code())
+            self.update_leader()
+            return True
+
+    def refresh_membership(self):
+        # Sends the membership version the client has; the leader returns the lists only when
+        # they changed, so an unchanged cluster costs one small unary call per interval.
+        try:
+            update = self.stub.GetMembership(chat_pb2.GetMembershipRequest(known_version=self.membership_version),
+                                             timeout=self.rpc_timeout)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                # A server without GetMembership; check liveness only.
+                if not self.check_health():
+                    print("Health check failed.")
+                    self.update_leader()
+            else:
+                print("Membership check failed:", e.code())
+                self.update_leader()
+            return
+        if update.version != self.membership_version:
+            self.apply_membership(update)
+
+    def apply_membership(self, update):
+        # Returns True when the leader moved and the client reconnected to it.
+        self.membership_version = update.version
+        if update.replica_addresses:
+            merged = set(self.config.get("replica_addresses", [])) | set(update.replica_addresses)
+            self.config["replica_addresses"] = list(merged)
+            print(f"[Client Membership] Updated replica list: {self.config['replica_addresses']}")
+        if update.leader_address and update.leader_address != self.leader_address:
+            print(f"Leader changed to {update.leader_address}")
+            self.connect_to_leader(update.leader_address)
+            return True
+        return False
+
+    def check_health(self):
+        # grpcio-health-checking is optional; without it liveness falls back to the channel state.
+        try:
+            from grpc_health.v1 import health_pb2, health_pb2_grpc
+        except ImportError:
+            health_pb2_grpc = None
+        try:
+            if health_pb2_grpc is None:
+                grpc.channel_ready_future(self.channel).result(timeout=self.rpc_timeout)
+                return True
+            resp = health_pb2_grpc.HealthStub(self.channel).Check(health_pb2.HealthCheckRequest(),
+                                                                  timeout=self.rpc_timeout)
+            return resp.status == health_pb2.HealthCheckResponse.SERVING
+        except grpc.RpcError as e:
+            # A server without the health service is still reachable.
+            return e.code() == grpc.StatusCode.UNIMPLEMENTED
+        except Exception:
+            return False
+
+    def get_message_cache(self, user):
+        if user not in self.message_caches:
+            self.message_caches[user] = MessageCache(user, self.cache_dir, self.sync_batch_size)
+        return self.message_caches[user]
+
+    def sync_messages(self, user):
+        return self.get_message_cache(user).sync(lambda request: self.call("SyncMessages", request),
+                                                 self.preview_length)
+
+    def conversation_page(self, user, peer, before=0, before_id=0):
+        # One page of the user's chat with `peer`, oldest first; pass the response's
+        # next_before/next_before_id to scroll further back.
+        return self.call("GetConversation", chat_pb2.GetConversationRequest(
+            user=user, peer=peer, before=before, before_id=before_id, limit=self.conversation_page_size,
+            preview_length=self.preview_length))
+
+    def message_body(self, user, message_id):
+        # Full text of a synced message, fetching it with GetBlob if only a preview is cached.
+        return self.get_message_cache(user).body(message_id, lambda request: self.call("GetBlob", request))
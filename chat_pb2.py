@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: chat.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'chat.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nchat.proto\x12\x04\x63hat\":\n\x14\x43reateAccountRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"9\n\x15\x43reateAccountResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"G\n\rLoginResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x14\n\x0cunread_count\x18\x03 \x01(\x05\"8\n\x13ListAccountsRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07pattern\x18\x02 \x01(\t\"9\n\x14ListAccountsResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x10\n\x08\x61\x63\x63ounts\x18\x02 \x03(\t\"A\n\x12SendMessageRequest\x12\x0e\n\x06sender\x18\x01 \x01(\t\x12\n\n\x02to\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\"7\n\x13SendMessageResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"9\n\x16ReadNewMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x05\"<\n\x17ReadNewMessagesResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x10\n\x08messages\x18\x02 \x03(\t\">\n\x15\x44\x65leteMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x05\":\n\x16\x44\x65leteMessagesResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"(\n\x14\x44\x65leteAccountRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"9\n\x15\x44\x65leteAccountResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\'\n\x13ListMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\"9\n\x14ListMessagesResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x10\n\x08messages\x18\x02 \x03(\t\"`\n\x13SyncMessagesRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08since_id\x18\x02 \x01(\x03\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x16\n\x0epreview_length\x18\x04 \x01(\x05\"\x86\x01\n\rSyncedMessage\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\t\x12\x0c\n\x04read\x18\x05 \x01(\x08\x12\x14\n\x0c\x63ontent_hash\x18\x06 \x01(\t\x12\x11\n\ttruncated\x18\x07 \x01(\x08\"\x95\x01\n\x14SyncMessagesResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12%\n\x08messages\x18\x02 \x03(\x0b\x32\x13.chat.SyncedMessage\x12\x13\n\x0b\x64\x65leted_ids\x18\x03 \x03(\x03\x12\x0f\n\x07last_id\x18\x04 \x01(\x03\x12\r\n\x05reset\x18\x05 \x01(\x08\x12\x10\n\x08has_more\x18\x06 \x01(\x08\"~\n\x16GetConversationRequest\x12\x0c\n\x04user\x18\x01 \x01(\t\x12\x0c\n\x04peer\x18\x02 \x01(\t\x12\x0e\n\x06\x62\x65\x66ore\x18\x03 \x01(\x03\x12\x11\n\tbefore_id\x18\x04 \x01(\x03\x12\r\n\x05limit\x18\x05 \x01(\x05\x12\x16\n\x0epreview_length\x18\x06 \x01(\x05\"\xa0\x01\n\x13\x43onversationMessage\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x11\n\trecipient\x18\x03 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x04 \x01(\t\x12\x12\n\ncreated_at\x18\x05 \x01(\x03\x12\x0c\n\x04read\x18\x06 \x01(\x08\x12\x14\n\x0c\x63ontent_hash\x18\x07 \x01(\t\x12\x11\n\ttruncated\x18\x08 \x01(\x08\"\xa7\x01\n\x17GetConversationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12+\n\x08messages\x18\x03 \x03(\x0b\x32\x19.chat.ConversationMessage\x12\x10\n\x08has_more\x18\x04 \x01(\x08\x12\x13\n\x0bnext_before\x18\x05 \x01(\x03\x12\x16\n\x0enext_before_id\x18\x06 \x01(\x03\"\x1e\n\x0eGetBlobRequest\x12\x0c\n\x04hash\x18\x01 \x01(\t\"D\n\x0fGetBlobResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07\x63ontent\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"\x82\x01\n\x10HeartbeatRequest\x12\x11\n\tleader_id\x18\x01 \x01(\x05\x12\x11\n\ttimestamp\x18\x02 \x01(\x03\x12\x16\n\x0eleader_address\x18\x03 \x01(\t\x12\x19\n\x11learner_addresses\x18\x04 \x03(\t\x12\x15\n\rapplied_index\x18\x05 \x01(\x03\">\n\x11HeartbeatResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x18\n\x10\x61\x63\x63\x65pt_encodings\x18\x02 \x03(\t\"\'\n\x0f\x45lectionRequest\x12\x14\n\x0c\x63\x61ndidate_id\x18\x01 \x01(\x05\"(\n\x10\x45lectionResponse\x12\x14\n\x0cvote_granted\x18\x01 \x01(\x08\"5\n\x0f\x43reateAccountOp\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"\xa0\x01\n\rSendMessageOp\x12\n\n\x02id\x18\x01 \x01(\x03\x12\x0e\n\x06sender\x18\x02 \x01(\t\x12\x11\n\trecipient\x18\x03 \x01(\t\x12\x0f\n\x07\x63ontent\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\x14\n\x0c\x63ontent_hash\x18\x06 \x01(\t\x12\x12\n\ncreated_at\x18\x07 \x01(\x03\x12\x12\n\nchange_seq\x18\x08 \x01(\x03\"M\n\x10\x44\x65leteMessagesOp\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x03\x12\x12\n\nchange_seq\x18\x03 \x01(\x03\"#\n\x0f\x44\x65leteAccountOp\x12\x10\n\x08username\x18\x01 \x01(\t\"G\n\nMarkReadOp\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x13\n\x0bmessage_ids\x18\x02 \x03(\x03\x12\x12\n\nchange_seq\x18\x03 \x01(\x03\"\xfa\x01\n\tOperation\x12/\n\x0e\x63reate_account\x18\x01 \x01(\x0b\x32\x15.chat.CreateAccountOpH\x00\x12+\n\x0csend_message\x18\x02 \x01(\x0b\x32\x13.chat.SendMessageOpH\x00\x12\x31\n\x0f\x64\x65lete_messages\x18\x03 \x01(\x0b\x32\x16.chat.DeleteMessagesOpH\x00\x12/\n\x0e\x64\x65lete_account\x18\x04 \x01(\x0b\x32\x15.chat.DeleteAccountOpH\x00\x12%\n\tmark_read\x18\x05 \x01(\x0b\x32\x10.chat.MarkReadOpH\x00\x42\x04\n\x02op\"5\n\x0eOperationBatch\x12#\n\noperations\x18\x01 \x03(\x0b\x32\x0f.chat.Operation\"\xb9\x01\n\x12ReplicationRequest\x12\x0f\n\x07payload\x18\x03 \x01(\x0c\x12\x10\n\x08\x65ncoding\x18\x04 \x01(\t\x12#\n\x05\x62\x61tch\x18\x05 \x01(\x0b\x32\x14.chat.OperationBatch\x12\r\n\x05index\x18\x06 \x01(\x03\x12\x12\n\nprev_index\x18\x07 \x01(\x03\x12\x16\n\x0eleader_address\x18\x08 \x01(\tJ\x04\x08\x01\x10\x02J\x04\x08\x02\x10\x03R\x0eoperation_typeR\x04\x64\x61ta\"e\n\x13ReplicationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x15\n\rapplied_index\x18\x03 \x01(\x03\x12\x15\n\rmissing_blobs\x18\x04 \x03(\t\"\x89\x01\n\x12JoinClusterRequest\x12\x1a\n\x12new_server_address\x18\x01 \x01(\t\x12\x18\n\x10\x61\x63\x63\x65pt_encodings\x18\x02 \x03(\t\x12\x0f\n\x07learner\x18\x03 \x01(\x08\x12\x14\n\x0chas_snapshot\x18\x04 \x01(\x08\x12\x16\n\x0esnapshot_index\x18\x05 \x01(\x03\"\xb3\x01\n\x13JoinClusterResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05state\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x18\n\x10\x63ompressed_state\x18\x04 \x01(\x0c\x12\x10\n\x08\x65ncoding\x18\x05 \x01(\t\x12)\n\x07\x63\x61tchup\x18\x06 \x03(\x0b\x32\x18.chat.ReplicationRequest\x12\x14\n\x0cleader_index\x18\x07 \x01(\x03\".\n\x12GetSnapshotRequest\x12\x18\n\x10\x61\x63\x63\x65pt_encodings\x18\x01 \x03(\t\"\x89\x01\n\x13GetSnapshotResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\r\n\x05state\x18\x02 \x01(\t\x12\x18\n\x10\x63ompressed_state\x18\x03 \x01(\x0c\x12\x10\n\x08\x65ncoding\x18\x04 \x01(\t\x12\x15\n\rapplied_index\x18\x05 \x01(\x03\x12\x0f\n\x07message\x18\x06 \x01(\t\"\x16\n\x14GetLeaderInfoRequest\"\xb2\x01\n\x15GetLeaderInfoResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x16\n\x0eleader_address\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x19\n\x11replica_addresses\x18\x04 \x03(\t\x12\x19\n\x11learner_addresses\x18\x05 \x03(\t\x12\x15\n\rapplied_index\x18\x06 \x01(\x03\x12\x12\n\nis_learner\x18\x07 \x01(\x08\"-\n\x14GetMembershipRequest\x12\x15\n\rknown_version\x18\x01 \x01(\x03\"q\n\x10MembershipUpdate\x12\x0f\n\x07version\x18\x01 \x01(\x03\x12\x16\n\x0eleader_address\x18\x02 \x01(\t\x12\x19\n\x11replica_addresses\x18\x03 \x03(\t\x12\x19\n\x11learner_addresses\x18\x04 \x03(\t\"\x13\n\x11GetMetricsRequest\"y\n\x12GetMetricsResponse\x12\x34\n\x06values\x18\x01 \x03(\x0b\x32$.chat.GetMetricsResponse.ValuesEntry\x1a-\n\x0bValuesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x03:\x02\x38\x01\":\n\x12SetProfilerRequest\x12\x0f\n\x07\x65nabled\x18\x01 \x01(\x08\x12\x13\n\x0binterval_ms\x18\x02 \x01(\x05\"L\n\x13SetProfilerResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x13\n\x0boutput_file\x18\x03 \x01(\t2\xba\x0b\n\x0b\x43hatService\x12H\n\rCreateAccount\x12\x1a.chat.CreateAccountRequest\x1a\x1b.chat.CreateAccountResponse\x12\x30\n\x05Login\x12\x12.chat.LoginRequest\x1a\x13.chat.LoginResponse\x12\x45\n\x0cListAccounts\x12\x19.chat.ListAccountsRequest\x1a\x1a.chat.ListAccountsResponse\x12\x42\n\x0bSendMessage\x12\x18.chat.SendMessageRequest\x1a\x19.chat.SendMessageResponse\x12N\n\x0fReadNewMessages\x12\x1c.chat.ReadNewMessagesRequest\x1a\x1d.chat.ReadNewMessagesResponse\x12K\n\x0e\x44\x65leteMessages\x12\x1b.chat.DeleteMessagesRequest\x1a\x1c.chat.DeleteMessagesResponse\x12H\n\rDeleteAccount\x12\x1a.chat.DeleteAccountRequest\x1a\x1b.chat.DeleteAccountResponse\x12\x45\n\x0cListMessages\x12\x19.chat.ListMessagesRequest\x1a\x1a.chat.ListMessagesResponse\x12\x45\n\x0cSyncMessages\x12\x19.chat.SyncMessagesRequest\x1a\x1a.chat.SyncMessagesResponse\x12\x36\n\x07GetBlob\x12\x14.chat.GetBlobRequest\x1a\x15.chat.GetBlobResponse\x12N\n\x0fGetConversation\x12\x1c.chat.GetConversationRequest\x1a\x1d.chat.GetConversationResponse\x12<\n\tHeartbeat\x12\x16.chat.HeartbeatRequest\x1a\x17.chat.HeartbeatResponse\x12\x39\n\x08\x45lection\x12\x15.chat.ElectionRequest\x1a\x16.chat.ElectionResponse\x12I\n\x12ReplicateOperation\x12\x18.chat.ReplicationRequest\x1a\x19.chat.ReplicationResponse\x12\x42\n\x0bJoinCluster\x12\x18.chat.JoinClusterRequest\x1a\x19.chat.JoinClusterResponse\x12\x42\n\x0bGetSnapshot\x12\x18.chat.GetSnapshotRequest\x1a\x19.chat.GetSnapshotResponse\x12H\n\rGetLeaderInfo\x12\x1a.chat.GetLeaderInfoRequest\x1a\x1b.chat.GetLeaderInfoResponse\x12\x43\n\rGetMembership\x12\x1a.chat.GetMembershipRequest\x1a\x16.chat.MembershipUpdate\x12G\n\x0fWatchMembership\x12\x1a.chat.GetMembershipRequest\x1a\x16.chat.MembershipUpdate0\x01\x12?\n\nGetMetrics\x12\x17.chat.GetMetricsRequest\x1a\x18.chat.GetMetricsResponse\x12\x42\n\x0bSetProfiler\x12\x18.chat.SetProfilerRequest\x1a\x19.chat.SetProfilerResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'chat_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_GETMETRICSRESPONSE_VALUESENTRY']._loaded_options = None
+  _globals['_GETMETRICSRESPONSE_VALUESENTRY']._serialized_options = b'8\001'
+  _globals['_CREATEACCOUNTREQUEST']._serialized_start=20
+  _globals['_CREATEACCOUNTREQUEST']._serialized_end=78
+  _globals['_CREATEACCOUNTRESPONSE']._serialized_start=80
+  _globals['_CREATEACCOUNTRESPONSE']._serialized_end=137
+  _globals['_LOGINREQUEST']._serialized_start=139
+  _globals['_LOGINREQUEST']._serialized_end=189
+  _globals['_LOGINRESPONSE']._serialized_start=191
+  _globals['_LOGINRESPONSE']._serialized_end=262
+  _globals['_LISTACCOUNTSREQUEST']._serialized_start=264
+  _globals['_LISTACCOUNTSREQUEST']._serialized_end=320
+  _globals['_LISTACCOUNTSRESPONSE']._serialized_start=322
+  _globals['_LISTACCOUNTSRESPONSE']._serialized_end=379
+  _globals['_SENDMESSAGEREQUEST']._serialized_start=381
+  _globals['_SENDMESSAGEREQUEST']._serialized_end=446
+  _globals['_SENDMESSAGERESPONSE']._serialized_start=448
+  _globals['_SENDMESSAGERESPONSE']._serialized_end=503
+  _globals['_READNEWMESSAGESREQUEST']._serialized_start=505
+  _globals['_READNEWMESSAGESREQUEST']._serialized_end=562
+  _globals['_READNEWMESSAGESRESPONSE']._serialized_start=564
+  _globals['_READNEWMESSAGESRESPONSE']._serialized_end=624
+  _globals['_DELETEMESSAGESREQUEST']._serialized_start=626
+  _globals['_DELETEMESSAGESREQUEST']._serialized_end=688
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_start=690
+  _globals['_DELETEMESSAGESRESPONSE']._serialized_end=748
+  _globals['_DELETEACCOUNTREQUEST']._serialized_start=750
+  _globals['_DELETEACCOUNTREQUEST']._serialized_end=790
+  _globals['_DELETEACCOUNTRESPONSE']._serialized_start=792
+  _globals['_DELETEACCOUNTRESPONSE']._serialized_end=849
+  _globals['_LISTMESSAGESREQUEST']._serialized_start=851
+  _globals['_LISTMESSAGESREQUEST']._serialized_end=890
+  _globals['_LISTMESSAGESRESPONSE']._serialized_start=892
+  _globals['_LISTMESSAGESRESPONSE']._serialized_end=949
+  _globals['_SYNCMESSAGESREQUEST']._serialized_start=951
+  _globals['_SYNCMESSAGESREQUEST']._serialized_end=1047
+  _globals['_SYNCEDMESSAGE']._serialized_start=1050
+  _globals['_SYNCEDMESSAGE']._serialized_end=1184
+  _globals['_SYNCMESSAGESRESPONSE']._serialized_start=1187
+  _globals['_SYNCMESSAGESRESPONSE']._serialized_end=1336
+  _globals['_GETCONVERSATIONREQUEST']._serialized_start=1338
+  _globals['_GETCONVERSATIONREQUEST']._serialized_end=1464
+  _globals['_CONVERSATIONMESSAGE']._serialized_start=1467
+  _globals['_CONVERSATIONMESSAGE']._serialized_end=1627
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_start=1630
+  _globals['_GETCONVERSATIONRESPONSE']._serialized_end=1797
+  _globals['_GETBLOBREQUEST']._serialized_start=1799
+  _globals['_GETBLOBREQUEST']._serialized_end=1829
+  _globals['_GETBLOBRESPONSE']._serialized_start=1831
+  _globals['_GETBLOBRESPONSE']._serialized_end=1899
+  _globals['_HEARTBEATREQUEST']._serialized_start=1902
+  _globals['_HEARTBEATREQUEST']._serialized_end=2032
+  _globals['_HEARTBEATRESPONSE']._serialized_start=2034
+  _globals['_HEARTBEATRESPONSE']._serialized_end=2096
+  _globals['_ELECTIONREQUEST']._serialized_start=2098
+  _globals['_ELECTIONREQUEST']._serialized_end=2137
+  _globals['_ELECTIONRESPONSE']._serialized_start=2139
+  _globals['_ELECTIONRESPONSE']._serialized_end=2179
+  _globals['_CREATEACCOUNTOP']._serialized_start=2181
+  _globals['_CREATEACCOUNTOP']._serialized_end=2234
+  _globals['_SENDMESSAGEOP']._serialized_start=2237
+  _globals['_SENDMESSAGEOP']._serialized_end=2397
+  _globals['_DELETEMESSAGESOP']._serialized_start=2399
+  _globals['_DELETEMESSAGESOP']._serialized_end=2476
+  _globals['_DELETEACCOUNTOP']._serialized_start=2478
+  _globals['_DELETEACCOUNTOP']._serialized_end=2513
+  _globals['_MARKREADOP']._serialized_start=2515
+  _globals['_MARKREADOP']._serialized_end=2586
+  _globals['_OPERATION']._serialized_start=2589
+  _globals['_OPERATION']._serialized_end=2839
+  _globals['_OPERATIONBATCH']._serialized_start=2841
+  _globals['_OPERATIONBATCH']._serialized_end=2894
+  _globals['_REPLICATIONREQUEST']._serialized_start=2897
+  _globals['_REPLICATIONREQUEST']._serialized_end=3082
+  _globals['_REPLICATIONRESPONSE']._serialized_start=3084
+  _globals['_REPLICATIONRESPONSE']._serialized_end=3185
+  _globals['_JOINCLUSTERREQUEST']._serialized_start=3188
+  _globals['_JOINCLUSTERREQUEST']._serialized_end=3325
+  _globals['_JOINCLUSTERRESPONSE']._serialized_start=3328
+  _globals['_JOINCLUSTERRESPONSE']._serialized_end=3507
+  _globals['_GETSNAPSHOTREQUEST']._serialized_start=3509
+  _globals['_GETSNAPSHOTREQUEST']._serialized_end=3555
+  _globals['_GETSNAPSHOTRESPONSE']._serialized_start=3558
+  _globals['_GETSNAPSHOTRESPONSE']._serialized_end=3695
+  _globals['_GETLEADERINFOREQUEST']._serialized_start=3697
+  _globals['_GETLEADERINFOREQUEST']._serialized_end=3719
+  _globals['_GETLEADERINFORESPONSE']._serialized_start=3722
+  _globals['_GETLEADERINFORESPONSE']._serialized_end=3900
+  _globals['_GETMEMBERSHIPREQUEST']._serialized_start=3902
+  _globals['_GETMEMBERSHIPREQUEST']._serialized_end=3947
+  _globals['_MEMBERSHIPUPDATE']._serialized_start=3949
+  _globals['_MEMBERSHIPUPDATE']._serialized_end=4062
+  _globals['_GETMETRICSREQUEST']._serialized_start=4064
+  _globals['_GETMETRICSREQUEST']._serialized_end=4083
+  _globals['_GETMETRICSRESPONSE']._serialized_start=4085
+  _globals['_GETMETRICSRESPONSE']._serialized_end=4206
+  _globals['_GETMETRICSRESPONSE_VALUESENTRY']._serialized_start=4161
+  _globals['_GETMETRICSRESPONSE_VALUESENTRY']._serialized_end=4206
+  _globals['_SETPROFILERREQUEST']._serialized_start=4208
+  _globals['_SETPROFILERREQUEST']._serialized_end=4266
+  _globals['_SETPROFILERRESPONSE']._serialized_start=4268
+  _globals['_SETPROFILERRESPONSE']._serialized_end=4344
+  _globals['_CHATSERVICE']._serialized_start=4347
+  _globals['_CHATSERVICE']._serialized_end=5813
+# @@protoc_insertion_point(module_scope)
@@ -1,52 +1,20 @@
-import os
-import json
+import datetime
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import grpc
-import hashlib
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import threading
 
 import chat_pb2
-import chat_pb2_grpc
-
-
-# Load client  from config_client.json
-
-with open("config_client.json", "r") as config_file:
-    client_config = json.load(config_file)
-
-# Force IPv4: use 127.0.0.1 for  connection
-host = client_config.get("client_connect_host", "127.0.0.1")
-if host == "localhost":
-    host = "127.0.0.1"
-client_config["client_connect_host"] = host
-
-# Read parameters
-RPC_TIMEOUT = client_config.get("rpc_timeout", 1)
-FALLBACK_TIMEOUT = client_config.get("fallback_timeout", 1)
-OVERALL_LEADER_LOOKUP_TIMEOUT = client_config.get("overall_leader_lookup_timeout", 5)
-RETRY_DELAY = client_config.get("retry_delay", 1)
-CLIENT_HEARTBEAT_INTERVAL = client_config.get("client_heartbeat_interval", 5)
-
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+from chat_client import ChatClient, hash_password, load_client_config
 
 class ChatClientApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, config):
         super().__init__()
         self.title("Chat Client")
         self.geometry("400x350")
         self.current_user = None
 
-        # Initial connection to the primary address from the config.
-        self.leader_address = f"{client_config['client_connect_host']}:{client_config['client_connect_port']}"
-        self.connect_to_leader(self.leader_address)
-
-        # Start background thread 
-        self.running = True
-        threading.Thread(target=self.client_heartbeat_check, daemon=True).start()
+        # Leader discovery, retries and the membership watch live in the GUI-free ChatClient.
+        self.client = ChatClient(config)
+        self.client.start()
 
         container = tk.Frame(self)
         container.pack(fill="both", expand=True)
@@ -57,75 +25,6 @@ class ChatClientApp(tk.Tk):
             frame.grid(row=0, column=0, sticky="nsew")
         self.show_frame(StartFrame)
 
-    def connect_to_leader(self, address):
-       
-        self.leader_address = address
-        self.channel = grpc.insecure_channel(address)
-        self.stub = chat_pb2_grpc.ChatServiceStub(self.channel)
-        print(f"Connected to leader at {address}")
-
-    def update_leader(self):
-        
-        fallback = client_config.get("replica_addresses", [])
-        def query_addr(addr):
-            try:
-                channel = grpc.insecure_channel(addr)
-                stub = chat_pb2_grpc.ChatServiceStub(channel)
-                resp = stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=FALLBACK_TIMEOUT)
-                return addr, resp
-            except Exception as ex:
-                return addr, None
-
-        with ThreadPoolExecutor(max_workers=len(fallback)) as executor:
-            futures = {executor.submit(query_addr, addr): addr for addr in fallback}
-            try:
-                for future in as_completed(futures, timeout=OVERALL_LEADER_LOOKUP_TIMEOUT):
-                    addr, resp = future.result()
-                    if resp and resp.success and resp.leader_address and resp.leader_address != "Unknown":
-                        print(f"Found leader at {resp.leader_address} via fallback address {addr}")
-                        self.connect_to_leader(resp.leader_address)
-                        new_list = resp.replica_addresses if resp.replica_addresses else []
-                        merged = set(fallback) | set(new_list)
-                        client_config["replica_addresses"] = list(merged)
-                        print(f"[Client Update] New runtime replica list: {client_config['replica_addresses']}")
-                        return
-            except Exception as e:
-                print("Exception during fallback leader lookup:", e)
-        print("Leader lookup failed on all fallback addresses; keeping current connection.")
-        time.sleep(RETRY_DELAY)
-
-    def call_rpc_with_retry(self, func, request, retries=3):
-        # helper to call an RPC
-        for i in range(retries):
-            try:
-                return func(request, timeout=RPC_TIMEOUT)
-            except grpc.RpcError as e:
-                if e.code() == grpc.StatusCode.UNAVAILABLE:
-                    print("RPC UNAVAILABLE. Updating leader and retrying...")
-                    self.update_leader()
-                    time.sleep(RETRY_DELAY)
-                else:
-                    raise
-        raise Exception("RPC failed after retries.")
-
-    def client_heartbeat_check(self):
-       #periodically sending info for connection verification
-        while self.running:
-            try:
-                resp = self.stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=RPC_TIMEOUT)
-                if not (resp.success and resp.leader_address and resp.leader_address != "Unknown"):
-                    print("Heartbeat check failed: invalid response.")
-                    self.update_leader()
-                else:
-                    new_list = resp.replica_addresses if resp.replica_addresses else []
-                    merged = set(client_config.get("replica_addresses", [])) | set(new_list)
-                    client_config["replica_addresses"] = list(merged)
-                    print(f"[Client Heartbeat] Updated replica list: {client_config['replica_addresses']}")
-            except Exception as e:
-                print("Heartbeat check failed:", e)
-                self.update_leader()
-            time.sleep(CLIENT_HEARTBEAT_INTERVAL)
-
     def show_frame(self, frame_class):
         frame = self.frames[frame_class]
         frame.tkraise()
@@ -136,8 +35,11 @@ class ChatClientApp(tk.Tk):
     def get_current_user(self):
         return self.current_user
 
+    def get_message_cache(self):
+        return self.client.get_message_cache(self.current_user)
+
     def cleanup(self):
-        self.running = False
+        self.client.close()
         self.destroy()
 
 class StartFrame(tk.Frame):
@@ -159,7 +61,7 @@ class StartFrame(tk.Frame):
         hashed_pass = hash_password(password)
         request = chat_pb2.CreateAccountRequest(username=username, password=hashed_pass)
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.CreateAccount, request)
+            response = self.controller.client.call("CreateAccount", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -178,7 +80,7 @@ class StartFrame(tk.Frame):
         hashed_pass = hash_password(password)
         request = chat_pb2.LoginRequest(username=username, password=hashed_pass)
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.Login, request)
+            response = self.controller.client.call("Login", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -203,6 +105,7 @@ class MainFrame(tk.Frame):
         tk.Button(self, text="Send Message", width=20, command=self.send_message).pack(pady=5)
         tk.Button(self, text="Read New Messages", width=20, command=self.read_new_messages).pack(pady=5)
         tk.Button(self, text="Show All Messages", width=20, command=self.show_all_messages).pack(pady=5)
+        tk.Button(self, text="Conversation", width=20, command=self.show_conversation).pack(pady=5)
         tk.Button(self, text="Delete My Account", width=20, command=self.delete_account).pack(pady=5)
         tk.Button(self, text="Logout", width=20, command=self.logout).pack(pady=5)
 
@@ -217,7 +120,7 @@ class MainFrame(tk.Frame):
             pattern = ""
         request = chat_pb2.ListAccountsRequest(username=self.controller.get_current_user(), pattern=pattern)
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.ListAccounts, request)
+            response = self.controller.client.call("ListAccounts", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -240,7 +143,7 @@ class MainFrame(tk.Frame):
             content=content
         )
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.SendMessage, request)
+            response = self.controller.client.call("SendMessage", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -260,7 +163,7 @@ class MainFrame(tk.Frame):
                 count = 0
         request = chat_pb2.ReadNewMessagesRequest(username=self.controller.get_current_user(), count=count)
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.ReadNewMessages, request)
+            response = self.controller.client.call("ReadNewMessages", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -274,24 +177,31 @@ class MainFrame(tk.Frame):
             messagebox.showerror("Error", "Error reading messages.")
 
     def show_all_messages(self):
-        request = chat_pb2.ListMessagesRequest(username=self.controller.get_current_user())
+        # Only changes since the last sync are transferred; the history comes from the local cache.
+        cache = self.controller.get_message_cache()
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.ListMessages, request)
+            synced = self.controller.client.sync_messages(self.controller.get_current_user())
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
-        if response.success:
-            ShowMessagesWindow(self.controller, response.messages)
+        if synced:
+            ShowMessagesWindow(self.controller, cache.read_messages())
         else:
             messagebox.showerror("Error", "Error listing messages.")
 
+    def show_conversation(self):
+        peer = simpledialog.askstring("Conversation", "Conversation with username:", parent=self)
+        if not peer:
+            return
+        ConversationWindow(self.controller, peer)
+
     def delete_account(self):
         confirm = messagebox.askyesno("Delete Account", "Are you sure you want to delete this account?\nUnread messages will be lost.")
         if not confirm:
             return
         request = chat_pb2.DeleteAccountRequest(username=self.controller.get_current_user())
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.DeleteAccount, request)
+            response = self.controller.client.call("DeleteAccount", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
@@ -317,33 +227,85 @@ class ShowMessagesWindow(tk.Toplevel):
         self.check_vars = []
         frame = tk.Frame(self)
         frame.pack(fill="both", expand=True)
-        for idx, msg in enumerate(self.messages, start=1):
+        for idx, (msg_id, msg) in enumerate(self.messages, start=1):
             var = tk.BooleanVar()
             chk = tk.Checkbutton(frame, text=f"{idx}. {msg}", variable=var, anchor="w", justify="left", wraplength=350)
             chk.pack(fill="x", padx=5, pady=2)
-            self.check_vars.append((var, idx))
+            self.check_vars.append((var, msg_id))
+        tk.Button(self, text="Show Full Text", command=self.show_selected).pack(pady=5)
         tk.Button(self, text="Delete Selected", command=self.delete_selected).pack(pady=5)
         tk.Button(self, text="Close", command=self.destroy).pack(pady=5)
 
+    def show_selected(self):
+        # Messages synced as previews end in "..."; their full body is fetched on demand.
+        selected = [msg_id for var, msg_id in self.check_vars if var.get()]
+        if not selected:
+            messagebox.showinfo("Info", "No messages selected.")
+            return
+        try:
+            bodies = [self.controller.client.message_body(self.controller.get_current_user(), msg_id)
+                      for msg_id in selected]
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+            return
+        messagebox.showinfo("Messages", "\n\n".join(body or "(unavailable)" for body in bodies))
+
     def delete_selected(self):
-        selected = [idx for var, idx in self.check_vars if var.get()]
+        selected = [msg_id for var, msg_id in self.check_vars if var.get()]
         if not selected:
             messagebox.showinfo("Info", "No messages selected.")
             return
         request = chat_pb2.DeleteMessagesRequest(username=self.controller.get_current_user(), message_ids=selected)
         try:
-            response = self.controller.call_rpc_with_retry(self.controller.stub.DeleteMessages, request)
+            response = self.controller.client.call("DeleteMessages", request)
         except Exception as e:
             messagebox.showerror("Error", str(e))
             return
         if response.success:
+            self.controller.get_message_cache().remove(selected)
             messagebox.showinfo("Success", response.message)
             self.destroy()
         else:
             messagebox.showerror("Error", response.message)
 
+class ConversationWindow(tk.Toplevel):
+    """Messages exchanged with one user, newest page first; "Load Older" fetches the page before."""
+
+    def __init__(self, controller: ChatClientApp, peer):
+        super().__init__()
+        self.controller = controller
+        self.peer = peer
+        self.title(f"Conversation with {peer}")
+        self.geometry("450x350")
+        self.before = 0
+        self.before_id = 0
+        self.text = tk.Text(self, wrap="word")
+        self.text.pack(fill="both", expand=True)
+        self.older_button = tk.Button(self, text="Load Older", command=self.load_page)
+        self.older_button.pack(pady=5)
+        tk.Button(self, text="Close", command=self.destroy).pack(pady=5)
+        self.load_page()
+
+    def load_page(self):
+        try:
+            response = self.controller.client.conversation_page(self.controller.get_current_user(), self.peer,
+                                                                self.before, self.before_id)
+        except Exception as e:
+            messagebox.showerror("Error", str(e), parent=self)
+            return
+        if not response.success:
+            messagebox.showerror("Error", response.message, parent=self)
+            return
+        lines = [f"{datetime.datetime.fromtimestamp(m.created_at / 1000):%Y-%m-%d %H:%M} {m.sender}: "
+                 f"{m.content}{'...' if m.truncated else ''}\n" for m in response.messages]
+        # Older pages go above what is already shown.
+        self.text.insert("1.0", "".join(lines))
+        self.before, self.before_id = response.next_before, response.next_before_id
+        if not response.has_more:
+            self.older_button.config(state="disabled")
+
 def main():
-    app = ChatClientApp()
+    app = ChatClientApp(load_client_config())
     app.protocol("WM_DELETE_WINDOW", app.cleanup)
     app.mainloop()
 
@@ -0,0 +1,281 @@
+import collections
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+
+import grpc
+
+import chat_pb2
+import chat_pb2_grpc
+import replicated_server
+
+CLIENT = "client"
+
+# Short timings so failover scenarios finish in seconds; every value is a normal server config key.
+FAST_CONFIG = {
+    "heartbeat_interval": 0.2,
+    "lease_timeout": 1.0,
+    "election_tick": 0.05,
+    "election_backoff": 0.3,
+    "peer_rpc_timeout": 0.5,
+    "payload_compression": "zlib",
+    "max_workers": 16,
+    "initial_reconnect_backoff_ms": 100,
+    "max_reconnect_backoff_ms": 500,
+}
+
+
+class InjectedFault(grpc.RpcError):
+    def __init__(self, code, details):
+        super().__init__(details)
+        self._code = code
+        self._details = details
+
+    def code(self):
+        return self._code
+
+    def details(self):
+        return self._details
+
+
+class FaultInjector:
+    """Simulated network between in-process nodes.
+
+    Latency and drop rules match on (source, destination, method); partitions cut every link
+    between two groups in both directions. Dropped and partitioned calls behave like lost
+    packets: they wait for the caller's deadline and then fail with DEADLINE_EXCEEDED.
+    """
+
+    def __init__(self, seed=0):
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.latency_rules = []
+        self.drop_rules = []
+        self.partitions = []
+        self.dropped = 0
+        # Calls seen per (source, destination, method), including lost ones.
+        self.calls = collections.Counter()
+
+    def interceptor(self, src, dst):
+        return _LinkInterceptor(self, src, dst)
+
+    def add_latency(self, seconds, src=None, dst=None, methods=None):
+        with self.lock:
+            self.latency_rules.append((src, dst, methods, seconds))
+
+    def add_drop(self, rate, src=None, dst=None, methods=None):
+        with self.lock:
+            self.drop_rules.append((src, dst, methods, rate))
+
+    def partition(self, group_a, group_b):
+        with self.lock:
+            self.partitions.append((set(group_a), set(group_b)))
+
+    def heal(self):
+        with self.lock:
+            self.latency_rules = []
+            self.drop_rules = []
+            self.partitions = []
+
+    def decide(self, src, dst, method):
+        # Returns (delay, lost) for one call.
+        with self.lock:
+            self.calls[(src, dst, method)] += 1
+            for a, b in self.partitions:
+                if (src in a and dst in b) or (src in b and dst in a):
+                    self.dropped += 1
+                    return 0.0, True
+            delay = sum(seconds for rule_src, rule_dst, methods, seconds in self.latency_rules
+                        if _matches(rule_src, rule_dst, methods, src, dst, method))
+            for rule_src, rule_dst, methods, rate in self.drop_rules:
+                if _matches(rule_src, rule_dst, methods, src, dst, method) and self.random.random() < rate:
+                    self.dropped += 1
+                    return delay, True
+            return delay, False
+
+
+def _matches(rule_src, rule_dst, methods, src, dst, method):
+    return ((rule_src is None or rule_src == src) and (rule_dst is None or rule_dst == dst)
+            and (methods is None or method in methods))
+
+
+class _LinkInterceptor(grpc.UnaryUnaryClientInterceptor):
+    def __init__(self, network, src, dst):
+        self.network = network
+        self.src = src
+        self.dst = dst
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        method = client_call_details.method.rsplit("/", 1)[-1]
+        delay, lost = self.network.decide(self.src, self.dst, method)
+        timeout = client_call_details.timeout
+        if lost:
+            time.sleep(timeout if timeout is not None else 1.0)
+            raise InjectedFault(grpc.StatusCode.DEADLINE_EXCEEDED, f"Injected loss {self.src} -> {self.dst}")
+        if delay:
+            time.sleep(delay)
+        return continuation(client_call_details, request)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalCluster:
+    """Runs several ReplicatedChatService nodes in this process on loopback ports.
+
+    Node 1 starts as leader. All peer traffic, and client traffic through client_stub(),
+    passes through `network`, so tests can slow, drop or partition links while nodes run.
+    `spare` extra addresses are reserved for nodes added later with join_node().
+    """
+
+    def __init__(self, size=3, config=None, seed=0, spare=0):
+        self.workdir = tempfile.mkdtemp(prefix="chat_cluster_")
+        self.network = FaultInjector(seed)
+        self.size = size
+        self.addresses = [f"127.0.0.1:{free_port()}" for _ in range(size + spare)]
+        self.base_config = dict(FAST_CONFIG, **(config or {}))
+        self.nodes = {}
+        self.client_stubs = {}
+
+    def node_config(self, index):
+        host, port = self.addresses[index - 1].split(":")
+        return dict(self.base_config, server_id=index, server_host=host, server_port=int(port),
+                    replica_addresses=self.addresses[:self.size], initial_leader=index == 1,
+                    db_file=os.path.join(self.workdir, f"chat_{index}.db"))
+
+    def start(self, timeout=10):
+        for index in range(1, self.size + 1):
+            self.start_node(index)
+        # Peers started after the leader are only reachable once its channels reconnect.
+        deadline = time.time() + timeout
+        while any(self.service(i).current_leader_address != self.addresses[0] for i in self.nodes if i != 1):
+            if time.time() > deadline:
+                raise TimeoutError("Followers did not receive a heartbeat from node 1")
+            time.sleep(0.01)
+        return self
+
+    def start_node(self, index, **overrides):
+        server, service = replicated_server.create_server(dict(self.node_config(index), **overrides),
+                                                          channel_interceptor_factory=self.network.interceptor)
+        replicated_server.start_server(server, service)
+        self.nodes[index] = (service, server)
+        return service
+
+    def join_node(self, index, role="voter", **overrides):
+        """Starts spare node `index`, which joins the running cluster (as a voter or learner) before returning."""
+        return self.start_node(index, join=True, role=role, join_addresses=self.addresses[:self.size], **overrides)
+
+    def stop_node(self, index):
+        service, server = self.nodes.pop(index)
+        replicated_server.stop_server(server, service, grace=0)
+
+    def close(self):
+        for index in list(self.nodes):
+            self.stop_node(index)
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def service(self, index):
+        return self.nodes[index][0]
+
+    def leaders(self):
+        return [index for index, (service, _) in self.nodes.items() if service.is_leader]
+
+    def wait_for_leader(self, among=None, timeout=30):
+        """Waits until exactly one of the `among` nodes (default: all running) leads.
+
+        Returns (leader index, seconds waited).
+        """
+        start = time.time()
+        while time.time() - start < timeout:
+            leaders = [i for i in self.leaders() if among is None or i in among]
+            if len(leaders) == 1:
+                return leaders[0], time.time() - start
+            time.sleep(0.01)
+        raise TimeoutError(f"No single leader after {timeout}s (leaders: {self.leaders()})")
+
+    def client_stub(self, index):
+        if index not in self.client_stubs:
+            channel = grpc.intercept_channel(grpc.insecure_channel(self.addresses[index - 1]),
+                                             self.network.interceptor(CLIENT, self.addresses[index - 1]))
+            self.client_stubs[index] = chat_pb2_grpc.ChatServiceStub(channel)
+        return self.client_stubs[index]
+
+    def messages(self, index):
+        conn = sqlite3.connect(self.node_config(index)["db_file"])
+        try:
+            return set(conn.execute("SELECT id, sender, recipient, content FROM messages").fetchall())
+        finally:
+            conn.close()
+
+    def divergence(self, a, b):
+        # Messages present on one node but not the other.
+        return len(self.messages(a) ^ self.messages(b))
+
+    def wait_for_convergence(self, a, b, timeout=10):
+        """Waits until nodes `a` and `b` store the same messages; returns the remaining divergence."""
+        deadline = time.time() + timeout
+        while self.divergence(a, b) and time.time() < deadline:
+            time.sleep(0.05)
+        return self.divergence(a, b)
+
+
+class Writer:
+    """Client that keeps sending messages to whichever node accepts writes.
+
+    Records when each write was acknowledged, so the longest gap spanning a fault is the write
+    unavailability window seen by a client.
+    """
+
+    def __init__(self, cluster, sender, recipient, timeout=0.5, interval=0.02):
+        self.cluster = cluster
+        self.sender = sender
+        self.recipient = recipient
+        self.timeout = timeout
+        self.interval = interval
+        self.acked = []
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.target = 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+
+    def run(self):
+        seq = 0
+        while not self.stop_event.is_set():
+            content = f"w{seq}"
+            try:
+                resp = self.cluster.client_stub(self.target).SendMessage(
+                    chat_pb2.SendMessageRequest(sender=self.sender, to=self.recipient, content=content),
+                    timeout=self.timeout)
+                if resp.success:
+                    self.acked.append((time.time(), content))
+                    seq += 1
+                    self.stop_event.wait(self.interval)
+                    continue
+            except grpc.RpcError:
+                pass
+            # Not the leader or unreachable: try the next node, as the client's leader lookup would.
+            self.target = self.target % len(self.cluster.addresses) + 1
+            self.stop_event.wait(self.interval)
+
+    def unavailability(self, fault_time):
+        """Seconds between the last write acknowledged before `fault_time` and the first one after."""
+        before = [t for t, _ in self.acked if t <= fault_time]
+        after = [t for t, _ in self.acked if t > fault_time]
+        if not after:
+            return float("inf")
+        return after[0] - (before[-1] if before else fault_time)
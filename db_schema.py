@@ -0,0 +1,136 @@
+"""SQLite schema of a server database, shared by replicated_server.py and list_db.py."""
+
+import datetime
+import json
+
+# Column order used for snapshots, exports and imports.
+TABLES = {
+    "accounts": ("username", "password"),
+    "messages": ("id", "sender", "recipient", "content", "read", "timestamp", "content_hash", "created_at",
+                 "conversation"),
+    "message_changes": ("seq", "message_id", "recipient", "deleted"),
+    "blobs": ("hash", "content", "refcount"),
+}
+
+# Raised when upgrade_data() gains a pass that existing databases must run.
+DATA_VERSION = 1
+
+
+def conversation_key(user, peer):
+    # Same key for both directions. Matches SQLite's json_array() output, which the backfill
+    # below uses and which leaves non-ASCII characters unescaped, and sorts like SQLite's
+    # default (binary) collation.
+    return json.dumps(sorted((user, peer)), separators=(",", ":"), ensure_ascii=False)
+
+
+def insert_statement(table, verb="INSERT"):
+    columns = TABLES[table]
+    return f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+
+def create_schema(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS accounts (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT,
+            recipient TEXT,
+            content TEXT,
+            read INTEGER DEFAULT 0,
+            timestamp TEXT,
+            content_hash TEXT,
+            created_at INTEGER,
+            conversation TEXT
+        )
+    ''')
+    # created_at is epoch milliseconds; `timestamp` keeps the "MM/DD HH:MM" display string.
+    add_missing_columns(cursor, "messages", {"content_hash": "TEXT", "created_at": "INTEGER",
+                                             "conversation": "TEXT"})
+    # GetConversation pages through one conversation by time (the rowid breaks ties).
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation, created_at)")
+    # Bodies above the server's blob_threshold, stored once per distinct content. The message
+    # row then holds the hash instead of the content; refcount is the number of such rows.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            content TEXT NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    # Change log for SyncMessages: one row per message holding its latest change
+    # (insert, read flag or deletion tombstone), ordered by seq.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL,
+            recipient TEXT NOT NULL,
+            deleted INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_changes_recipient_seq ON message_changes (recipient, seq)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_changes_message ON message_changes (message_id)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS replication_state (key TEXT PRIMARY KEY, value INTEGER)")
+
+
+def add_missing_columns(cursor, table, columns):
+    # Upgrades databases created before a column was added; new rows fill it in.
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def upgrade_data(cursor, now=None):
+    # One-off passes over rows written by older versions. They scan whole tables, so the
+    # version they brought the data to is recorded in replication_state and later starts
+    # skip them.
+    row = cursor.execute("SELECT value FROM replication_state WHERE key='data_version'").fetchone()
+    if (row[0] if row else 0) < DATA_VERSION:
+        backfill_message_times(cursor, now)
+        cursor.execute("INSERT OR REPLACE INTO replication_state (key, value) VALUES ('data_version', ?)",
+                       (DATA_VERSION,))
+
+
+def reset_data_version(cursor):
+    # Rows loaded from outside (e.g. an import of an old export) may need the upgrades again.
+    cursor.execute("DELETE FROM replication_state WHERE key='data_version'")
+
+
+def backfill_message_times(cursor, now=None):
+    # Messages stored before created_at and conversation existed. Their display timestamp has
+    # no year, so the latest year that does not put the message in the future is assumed.
+    cursor.execute('''
+        UPDATE messages SET conversation = CASE WHEN sender < recipient THEN json_array(sender, recipient)
+                                                ELSE json_array(recipient, sender) END
+        WHERE conversation IS NULL
+    ''')
+    now = now or datetime.datetime.now()
+    rows = cursor.execute("SELECT id, timestamp FROM messages WHERE created_at IS NULL").fetchall()
+    updates = []
+    for message_id, timestamp in rows:
+        created_at = 0
+        for year in range(now.year, now.year - 5, -1):
+            try:
+                when = datetime.datetime.strptime(f"{year}/{timestamp}", "%Y/%m/%d %H:%M")
+            except (TypeError, ValueError):
+                continue
+            if when <= now:
+                created_at = int(when.timestamp() * 1000)
+                break
+        updates.append((created_at, message_id))
+    cursor.executemany("UPDATE messages SET created_at=? WHERE id=?", updates)
+
+
+def backfill_change_log(cursor):
+    # Databases created before the change log existed (or bulk-imported without it) get one
+    # entry per existing message.
+    cursor.execute('''
+        INSERT INTO message_changes (message_id, recipient)
+        SELECT id, recipient FROM messages
+        WHERE NOT EXISTS (SELECT 1 FROM message_changes) ORDER BY id
+    ''')
@@ -12,6 +12,7 @@ def main():
     db_file = master_config.get("db_file", "chat.db")
     heartbeat_interval = master_config.get("heartbeat_interval", 3)
     lease_timeout = master_config.get("lease_timeout", 10)
+    workers = master_config.get("workers", 1)
     
     processes = []
     
@@ -22,7 +23,8 @@ def main():
             "--server_id", str(instance["server_id"]),
             "--server_host", instance["server_host"],
             "--server_port", str(instance["server_port"]),
-            "--initial_leader", str(instance.get("initial_leader", False))
+            "--initial_leader", str(instance.get("initial_leader", False)),
+            "--workers", str(instance.get("workers", workers))
         ]
         
         env = os.environ.copy()
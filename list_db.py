@@ -1,46 +1,416 @@
 import argparse
+import csv
+import datetime
+import gzip
+import json
 import sqlite3
+import sys
+import time
 
-def list_db(db_file):
-    # Connect to the specified SQLite database.
-    conn = sqlite3.connect(db_file)
+import db_schema
+
+# pyarrow is optional; without it the "parquet" format is unavailable and "columnar" (JSON row
+# groups) can be used instead.
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+FORMATS = ("jsonl", "csv", "columnar", "parquet")
+# CSV has no null; \N marks NULL as in PostgreSQL and MySQL dumps, so empty strings survive.
+CSV_NULL = "\\N"
+DEFAULT_BATCH_SIZE = 10000
+
+# Queries the server runs per request, with sample parameters, checked by `stats` for index use.
+HOT_QUERIES = (
+    ("Login", "SELECT password FROM accounts WHERE username=?", ("user",)),
+    ("Login unread count", "SELECT COUNT(*) FROM messages WHERE recipient=? AND read=0", ("user",)),
+    ("ListMessages", "SELECT m.sender, COALESCE(b.content, m.content), m.timestamp FROM messages m "
+                     "LEFT JOIN blobs b ON b.hash = m.content_hash WHERE m.recipient=? AND m.read=1", ("user",)),
+    ("ReadNewMessages", "SELECT m.id, m.sender, COALESCE(b.content, m.content), m.timestamp FROM messages m "
+                        "LEFT JOIN blobs b ON b.hash = m.content_hash WHERE m.recipient=? AND m.read=0", ("user",)),
+    ("SyncMessages", "SELECT c.seq, m.sender, b.content FROM message_changes c LEFT JOIN messages m ON m.id = c.message_id "
+                     "LEFT JOIN blobs b ON b.hash = m.content_hash "
+                     "WHERE c.recipient=? AND c.seq>? ORDER BY c.seq LIMIT ?", ("user", 0, 1000)),
+    ("GetBlob", "SELECT content FROM blobs WHERE hash=?", ("0" * 64,)),
+    ("GetConversation", "SELECT m.id, m.sender, COALESCE(b.content, m.content) FROM messages m "
+                        "LEFT JOIN blobs b ON b.hash = m.content_hash WHERE m.conversation=? "
+                        "AND (m.created_at, m.id) < (?, ?) ORDER BY m.created_at DESC, m.id DESC LIMIT ?",
+     ('["a","b"]', 0, 0, 50)),
+    ("DeleteMessages", "DELETE FROM messages WHERE id=? AND recipient=?", (1, "user")),
+    ("DeleteAccount", "DELETE FROM messages WHERE recipient=?", ("user",)),
+)
+
+
+class Progress:
+    """Counts rows and reports throughput on stderr, at most every `interval` seconds."""
+
+    def __init__(self, label, interval=5.0):
+        self.label = label
+        self.interval = interval
+        self.rows = 0
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def add(self, count):
+        self.rows += count
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now, final=False)
+
+    def report(self, now=None, final=True):
+        elapsed = (now or time.perf_counter()) - self.start
+        rate = self.rows / elapsed if elapsed > 0 else 0.0
+        status = "done" if final else "so far"
+        print(f"{self.label}: {self.rows} rows {status} in {elapsed:.2f}s ({rate:.0f} rows/s)", file=sys.stderr)
+        return rate
+
+
+def open_text(path, mode):
+    # "-" is stdin/stdout; a .gz suffix compresses on the fly.
+    if path == "-":
+        return sys.stdout if "w" in mode else sys.stdin
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def existing_columns(conn, table):
+    # Schema columns present in this database; older databases lack columns added since, and
+    # tables that do not exist yet have none.
+    present = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    return tuple(c for c in db_schema.TABLES[table] if c in present)
+
+
+def parse_time(value):
+    """Epoch seconds, or an ISO date/time in local time ("2026-03-14", "2026-03-14 12:30"), as epoch ms."""
+    try:
+        return int(float(value) * 1000)
+    except ValueError:
+        pass
+    try:
+        return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is neither epoch seconds nor an ISO date/time")
+
+
+def select_rows(table, recipient=None, since=None, until=None, columns=None):
+    """Returns (sql, params) streaming `table` in primary-key order with the given filters.
+
+    `since`/`until` are epoch milliseconds compared with the messages' created_at.
+    """
+    columns = columns or db_schema.TABLES[table]
+    where, params = [], []
+    if recipient is not None:
+        if "recipient" not in columns:
+            raise ValueError(f"Table '{table}' has no recipient column")
+        where.append("recipient=?")
+        params.append(recipient)
+    for value, op in ((since, ">="), (until, "<")):
+        if value is not None:
+            if "created_at" not in columns:
+                raise ValueError(f"Table '{table}' has no created_at column; messages in databases a "
+                                 f"server has not opened since it was added cannot be filtered by time")
+            where.append(f"created_at{op}?")
+            params.append(value)
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return sql + f" ORDER BY {columns[0]}", params
+
+
+def iter_batches(conn, sql, params=(), batch_size=DEFAULT_BATCH_SIZE):
+    # fetchmany keeps memory bounded by the batch size regardless of the table size.
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+class JsonlWriter:
+    def __init__(self, path, columns):
+        self.file = open_text(path, "w")
+        self.columns = columns
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(dict(zip(self.columns, row))) + "\n" for row in rows)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open_text(path, "w")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows([CSV_NULL if v is None else v for v in row] for row in rows)
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ColumnarWriter:
+    """One JSON line per batch holding each column as an array, like a Parquet row group."""
+
+    def __init__(self, path, columns):
+        self.file = open_text(path, "w")
+        self.columns = columns
+
+    def write(self, rows):
+        group = {"rows": len(rows), "columns": {c: [row[i] for row in rows] for i, c in enumerate(self.columns)}}
+        self.file.write(json.dumps(group) + "\n")
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        if pyarrow is None:
+            raise RuntimeError("The parquet format needs pyarrow; use --format columnar instead")
+        self.columns = columns
+        self.writer = None
+        self.path = path
+
+    def write(self, rows):
+        table = pyarrow.table({c: [row[i] for row in rows] for i, c in enumerate(self.columns)})
+        if self.writer is None:
+            self.writer = parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "columnar": ColumnarWriter, "parquet": ParquetWriter}
+
+
+def read_batches(fmt, path, columns, batch_size=DEFAULT_BATCH_SIZE):
+    """Yields lists of row tuples in `columns` order from an exported file."""
+    if fmt == "parquet":
+        if pyarrow is None:
+            raise RuntimeError("The parquet format needs pyarrow")
+        # Files exported from older databases lack columns added since; those import as NULL.
+        source = parquet.ParquetFile(path)
+        present = [c for c in columns if c in source.schema_arrow.names]
+        for record_batch in source.iter_batches(batch_size=batch_size, columns=present):
+            data = record_batch.to_pydict()
+            missing = [None] * record_batch.num_rows
+            yield list(zip(*(data.get(c, missing) for c in columns)))
+        return
+    f = open_text(path, "r")
+    try:
+        if fmt == "columnar":
+            for line in f:
+                group = json.loads(line)
+                missing = [None] * group["rows"]
+                yield list(zip(*(group["columns"].get(c, missing) for c in columns)))
+            return
+        if fmt == "jsonl":
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+        null = CSV_NULL if fmt == "csv" else None
+        batch = []
+        for record in records:
+            batch.append(tuple(None if record.get(c) == null else record.get(c) for c in columns))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def export_table(conn, table, fmt, output, batch_size=DEFAULT_BATCH_SIZE, recipient=None, since=None, until=None):
+    """Streams `table` to `output`; returns the number of rows written."""
+    columns = existing_columns(conn, table)
+    if not columns:
+        raise ValueError(f"Table '{table}' does not exist in this database")
+    sql, params = select_rows(table, recipient, since, until, columns)
+    writer = WRITERS[fmt](output, columns)
+    progress = Progress(f"export {table}")
+    try:
+        for rows in iter_batches(conn, sql, params, batch_size):
+            writer.write(rows)
+            progress.add(len(rows))
+    finally:
+        writer.close()
+    progress.report()
+    return progress.rows
+
+
+def import_table(conn, table, fmt, input_path, batch_size=DEFAULT_BATCH_SIZE, append=False):
+    """Loads an exported file into `table`, one transaction per batch; returns the row count.
+
+    The schema is created if missing. The server backfills the SyncMessages change log on
+    startup when messages are imported without their message_changes export, and fills in
+    created_at and conversation for messages from exports made before those columns existed.
+    """
     cursor = conn.cursor()
+    db_schema.create_schema(cursor)
+    conn.commit()
+    if not append and cursor.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+        raise ValueError(f"Table '{table}' is not empty; pass --append to add rows anyway")
+    if table == "messages":
+        db_schema.reset_data_version(cursor)
+        conn.commit()
+    sql = db_schema.insert_statement(table)
+    progress = Progress(f"import {table}")
+    for rows in read_batches(fmt, input_path, db_schema.TABLES[table], batch_size):
+        with conn:
+            conn.executemany(sql, rows)
+        progress.add(len(rows))
+    progress.report()
+    return progress.rows
 
-    # Fetch and display all users.
-    print("Users:")
+
+def list_db(db_file, recipient=None, since=None, until=None, batch_size=DEFAULT_BATCH_SIZE):
+    conn = sqlite3.connect(db_file)
     try:
-        cursor.execute("SELECT * FROM accounts")
-        users = cursor.fetchall()
-        if users:
-            for row in users:
+        # Display all users.
+        print("Users:")
+        found = False
+        for rows in iter_batches(conn, *select_rows("accounts", columns=existing_columns(conn, "accounts")),
+                                 batch_size):
+            found = True
+            for row in rows:
                 print(row)
-        else:
+        if not found:
             print("No users found.")
-    except sqlite3.Error as e:
-        print(f"Error retrieving users: {e}")
 
-    # Fetch and display all messages.
-    print("\nMessages:")
-    try:
-        cursor.execute("SELECT * FROM messages")
-        messages = cursor.fetchall()
-        if messages:
-            for row in messages:
+        # Display all messages.
+        print("\nMessages:")
+        found = False
+        sql, params = select_rows("messages", recipient, since, until, existing_columns(conn, "messages"))
+        for rows in iter_batches(conn, sql, params, batch_size):
+            found = True
+            for row in rows:
                 print(row)
-        else:
+        if not found:
             print("No messages found.")
-    except sqlite3.Error as e:
-        print(f"Error retrieving messages: {e}")
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error reading database: {e}")
+    finally:
+        conn.close()
+
+
+def percentile(sorted_counts, fraction):
+    return sorted_counts[min(len(sorted_counts) - 1, int(fraction * len(sorted_counts)))]
+
+
+def print_stats(conn, top=10):
+    tables = [t for t in db_schema.TABLES if existing_columns(conn, t)]
+    print("Row counts:")
+    for table in db_schema.TABLES:
+        if table in tables:
+            print(f"  {table:<16} {conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]}")
+        else:
+            print(f"  {table:<16} missing (created when a server opens the database)")
+    unread = conn.execute("SELECT COUNT(*) FROM messages WHERE read=0").fetchone()[0]
+    print(f"  {'unread messages':<16} {unread}")
+
+    # One count per recipient, so memory grows with the number of users, not messages.
+    counts = [row[0] for row in conn.execute("SELECT COUNT(*) AS c FROM messages GROUP BY recipient ORDER BY c")]
+    print("\nMessages per recipient:")
+    if counts:
+        print(f"  recipients={len(counts)} min={counts[0]} p50={percentile(counts, 0.5)} "
+              f"p90={percentile(counts, 0.9)} p99={percentile(counts, 0.99)} max={counts[-1]} "
+              f"mean={sum(counts) / len(counts):.1f}")
+        for recipient, count in conn.execute(
+                "SELECT recipient, COUNT(*) AS c FROM messages GROUP BY recipient ORDER BY c DESC LIMIT ?", (top,)):
+            print(f"  {recipient:<24} {count}")
+    else:
+        print("  no messages")
+
+    if "blobs" in tables:
+        count, size, refs = conn.execute("SELECT COUNT(*), COALESCE(SUM(length(content)), 0), "
+                                         "COALESCE(SUM(refcount), 0) FROM blobs").fetchone()
+        print(f"  {'blob bytes':<16} {size} stored for {refs} message references ({count} distinct)")
+
+    print("\nIndexes:")
+    for table in tables:
+        for _, name, unique, origin, _ in conn.execute(f"PRAGMA index_list({table})"):
+            columns = [row[2] for row in conn.execute(f"PRAGMA index_info({name})")]
+            kind = {"pk": "primary key", "u": "unique constraint"}.get(origin, "unique" if unique else "index")
+            print(f"  {table}.{name} ({', '.join(columns)}) [{kind}]")
+
+    print("\nQuery plans for server queries:")
+    for name, sql, params in HOT_QUERIES:
+        try:
+            details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        except sqlite3.Error as e:
+            print(f"  {name}: {e}")
+            continue
+        # "SCAN <table>" without an index reads every row.
+        full_scan = any(d.startswith("SCAN") and "INDEX" not in d for d in details)
+        print(f"  {name}{'  <-- full table scan' if full_scan else ''}")
+        for detail in details:
+            print(f"      {detail}")
 
-    # Close the connection.
-    conn.close()
 
 def main():
-    parser = argparse.ArgumentParser(description="List all users and messages from a SQLite database.")
+    parser = argparse.ArgumentParser(description="List, export, import and inspect a chat server SQLite database.")
     parser.add_argument("db_name", help="Name (and path) of the SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Rows fetched or inserted per batch (bounds memory use)")
+    commands = parser.add_subparsers(dest="command")
+
+    def add_filters(p):
+        p.add_argument("--recipient", help="Only messages for this user")
+        p.add_argument("--since", type=parse_time, help="Only messages at or after this time (epoch seconds or ISO date)")
+        p.add_argument("--until", type=parse_time, help="Only messages before this time (epoch seconds or ISO date)")
+
+    add_filters(commands.add_parser("list", help="Print all users and messages (default)"))
+    export = commands.add_parser("export", help="Stream a table to a file")
+    export.add_argument("--table", choices=db_schema.TABLES, default="messages")
+    export.add_argument("--format", choices=FORMATS, default="jsonl")
+    export.add_argument("--output", default="-", help='Output path ("-" for stdout, .gz to compress)')
+    add_filters(export)
+    load = commands.add_parser("import", help="Bulk-load an exported file into the database")
+    load.add_argument("--table", choices=db_schema.TABLES, default="messages")
+    load.add_argument("--format", choices=FORMATS, default="jsonl")
+    load.add_argument("--input", default="-", help='Input path ("-" for stdin)')
+    load.add_argument("--append", action="store_true", help="Allow importing into a non-empty table")
+    stats = commands.add_parser("stats", help="Row counts, per-user distribution and index usage")
+    stats.add_argument("--top", type=int, default=10, help="Number of busiest recipients to show")
     args = parser.parse_args()
 
-    list_db(args.db_name)
+    if args.command in (None, "list"):
+        list_db(args.db_name, getattr(args, "recipient", None), getattr(args, "since", None),
+                getattr(args, "until", None), args.batch_size)
+        return
+    conn = sqlite3.connect(args.db_name)
+    try:
+        if args.command == "export":
+            export_table(conn, args.table, args.format, args.output, args.batch_size,
+                         args.recipient, args.since, args.until)
+        elif args.command == "import":
+            conn.execute("PRAGMA journal_mode=WAL")
+            import_table(conn, args.table, args.format, args.input, args.batch_size, args.append)
+        else:
+            print_stats(conn, args.top)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`; stop quietly.
+        sys.stderr.close()
+    except (ValueError, RuntimeError, sqlite3.Error) as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        conn.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import sqlite3
+
+import chat_pb2
+
+
+class MessageCache:
+    """Local SQLite copy of one user's mailbox, kept current with SyncMessages deltas.
+
+    The cache survives client restarts and leader failover: each sync sends the last change id
+    seen, so the server only returns messages added or changed since then plus tombstones for
+    deleted ones.
+    """
+
+    def __init__(self, username, cache_dir="client_cache", batch_size=1000):
+        self.username = username
+        self.batch_size = batch_size
+        os.makedirs(cache_dir, exist_ok=True)
+        # Hashed so any username maps to a safe file name.
+        name = hashlib.sha256(username.encode()).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, f"messages_{name}.db")
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                sender TEXT,
+                content TEXT,
+                timestamp TEXT,
+                read INTEGER DEFAULT 0,
+                content_hash TEXT,
+                truncated INTEGER DEFAULT 0
+            )
+        ''')
+        # Caches created before previews existed.
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(messages)")}
+        for name, definition in (("content_hash", "TEXT"), ("truncated", "INTEGER DEFAULT 0")):
+            if name not in columns:
+                self.conn.execute(f"ALTER TABLE messages ADD COLUMN {name} {definition}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value INTEGER)")
+        self.conn.commit()
+
+    @property
+    def last_id(self):
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key='last_id'").fetchone()
+        return row[0] if row else 0
+
+    def apply(self, response):
+        with self.conn:
+            if response.reset:
+                self.conn.execute("DELETE FROM messages")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO messages (id, sender, content, timestamp, read, content_hash, truncated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(m.id, m.sender, m.content, m.timestamp, int(m.read), m.content_hash or None, int(m.truncated))
+                 for m in response.messages])
+            self.conn.executemany("DELETE FROM messages WHERE id=?", [(i,) for i in response.deleted_ids])
+            self.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_id', ?)",
+                              (response.last_id,))
+
+    def sync(self, call, preview_length=0):
+        """Pulls all pending changes; `call` sends a SyncMessagesRequest and returns the response.
+
+        With `preview_length`, long blob-stored bodies arrive cut to that length and are
+        fetched in full with body() when needed.
+        """
+        while True:
+            response = call(chat_pb2.SyncMessagesRequest(username=self.username, since_id=self.last_id,
+                                                         limit=self.batch_size, preview_length=preview_length))
+            if not response.success:
+                return False
+            self.apply(response)
+            if not response.has_more:
+                return True
+
+    def read_messages(self):
+        # (id, display string) pairs in the same format ListMessages uses.
+        rows = self.conn.execute("SELECT id, sender, content, timestamp, truncated FROM messages WHERE read=1 ORDER BY id")
+        return [(r[0], f"{r[3]} - From: {r[1]} - {r[2]}{'...' if r[4] else ''}") for r in rows]
+
+    def body(self, message_id, fetch):
+        """Full body of a cached message; `fetch` sends a GetBlobRequest for truncated ones.
+
+        The fetched body replaces the preview in every cached message sharing the blob.
+        """
+        row = self.conn.execute("SELECT content, content_hash, truncated FROM messages WHERE id=?",
+                                (message_id,)).fetchone()
+        if row is None:
+            return None
+        content, content_hash, truncated = row
+        if not truncated:
+            return content
+        response = fetch(chat_pb2.GetBlobRequest(hash=content_hash))
+        if not response.success:
+            return None
+        with self.conn:
+            self.conn.execute("UPDATE messages SET content=?, truncated=0 WHERE content_hash=?",
+                              (response.content, content_hash))
+        return response.content
+
+    def remove(self, message_ids):
+        with self.conn:
+            self.conn.executemany("DELETE FROM messages WHERE id=?", [(i,) for i in message_ids])
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,35 @@
+import threading
+
+
+def metric_key(name, labels=None):
+    # Prometheus-style flat key, e.g. admission_rejected_total{method="SendMessage",reason="user_rate"}
+    if not labels:
+        return name
+    rendered = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and gauges exported through the GetMetrics RPC."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, name, labels=None, amount=1):
+        key = metric_key(name, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, name, value, labels=None):
+        key = metric_key(name, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def get(self, name, labels=None):
+        with self.lock:
+            return self.values.get(metric_key(name, labels), 0)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.values)
@@ -0,0 +1,69 @@
+import zlib
+
+# zstandard is optional; zlib is always available from the standard library.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+IDENTITY = "identity"
+ZLIB = "zlib"
+ZSTD = "zstd"
+
+
+def available_encodings():
+    # Ordered by preference: the first entry is the best codec we can decode.
+    encodings = []
+    if zstandard is not None:
+        encodings.append(ZSTD)
+    encodings.append(ZLIB)
+    encodings.append(IDENTITY)
+    return encodings
+
+
+def resolve_encoding(preferred):
+    """Return `preferred` if this process supports it, otherwise the best fallback."""
+    preferred = (preferred or IDENTITY).lower()
+    if preferred in ("none", "off", ""):
+        return IDENTITY
+    supported = available_encodings()
+    if preferred in supported:
+        return preferred
+    if preferred == ZSTD:
+        return ZLIB
+    raise ValueError(f"Unknown payload encoding '{preferred}'")
+
+
+def negotiate(preferred, accepted):
+    """Pick the encoding to send to a peer that advertised `accepted`."""
+    preferred = resolve_encoding(preferred)
+    if preferred == IDENTITY or preferred in accepted:
+        return preferred
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return IDENTITY
+
+
+def compress(data: bytes, encoding, level=None) -> bytes:
+    if encoding == IDENTITY:
+        return data
+    if encoding == ZLIB:
+        return zlib.compress(data, 6 if level is None else level)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd payload encoding requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    raise ValueError(f"Unknown payload encoding '{encoding}'")
+
+
+def decompress(data: bytes, encoding) -> bytes:
+    if not encoding or encoding == IDENTITY:
+        return data
+    if encoding == ZLIB:
+        return zlib.decompress(data)
+    if encoding == ZSTD:
+        if zstandard is None:
+            raise ValueError("zstd payload encoding requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown payload encoding '{encoding}'")
@@ -0,0 +1,71 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class StackSampler:
+    """On-demand sampling profiler covering every thread of the process.
+
+    While running, a background thread snapshots all thread stacks every `interval` seconds.
+    stop() writes the samples in collapsed-stack format ("frame;frame;frame count" per line),
+    which flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, output_dir=".", prefix="profile"):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop_event = None
+        self.samples = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self, interval=0.01):
+        with self.lock:
+            if self.thread is not None:
+                return False
+            self.samples = collections.Counter()
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(interval, self.stop_event, self.samples),
+                                           daemon=True)
+            self.thread.start()
+            return True
+
+    def stop(self):
+        """Stops sampling and returns the path of the written profile, or None if not running."""
+        with self.lock:
+            if self.thread is None:
+                return None
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+            samples = self.samples
+        path = os.path.join(self.output_dir, f"{self.prefix}_{int(time.time())}.folded")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def toggle(self, interval=0.01):
+        if self.running:
+            return self.stop()
+        self.start(interval)
+        return None
+
+    def _run(self, interval, stop_event, samples):
+        me = threading.get_ident()
+        while not stop_event.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                samples[";".join(reversed(stack))] += 1
@@ -6,282 +6,1165 @@ import time
 import random
 import sqlite3
 import datetime
+import hashlib
 import logging
 import argparse
-from concurrent import futures
+import collections
+import signal
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import chat_pb2
 import chat_pb2_grpc
+import admission
+import db_schema
+import metrics
+import payload_codec
+import profiler
+import tracing
 
-def parse_args():
+# gRPC defaults: 4 MiB receive limit, unlimited send.
+DEFAULT_MAX_RECEIVE_MESSAGE_LENGTH = 4 * 1024 * 1024
+DEFAULT_MAX_SEND_MESSAGE_LENGTH = -1
+# HTTP/2 keepalive: ping idle connections so dead peers and clients are noticed.
+DEFAULT_KEEPALIVE_TIME_MS = 20000
+DEFAULT_KEEPALIVE_TIMEOUT_MS = 5000
+DEFAULT_MIN_CLIENT_PING_INTERVAL_MS = 10000
+HEALTH_SERVICE_NAME = "chat.ChatService"
+
+GRPC_COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+def grpc_options(config):
+    return [
+        ("grpc.max_send_message_length",
+         config.get("max_send_message_length", DEFAULT_MAX_SEND_MESSAGE_LENGTH)),
+        ("grpc.max_receive_message_length",
+         config.get("max_receive_message_length", DEFAULT_MAX_RECEIVE_MESSAGE_LENGTH)),
+    ] + keepalive_options(config) + [
+        # gRPC backs off up to 120s between reconnects by default, which would keep a restarted
+        # peer unreachable long after it is back.
+        ("grpc.initial_reconnect_backoff_ms", config.get("initial_reconnect_backoff_ms", 1000)),
+        ("grpc.max_reconnect_backoff_ms", config.get("max_reconnect_backoff_ms", 10000)),
+    ]
+
+def keepalive_options(config):
+    keepalive = config.get("keepalive", {})
+    return [
+        ("grpc.keepalive_time_ms", keepalive.get("time_ms", DEFAULT_KEEPALIVE_TIME_MS)),
+        ("grpc.keepalive_timeout_ms", keepalive.get("timeout_ms", DEFAULT_KEEPALIVE_TIMEOUT_MS)),
+        ("grpc.keepalive_permit_without_calls", 1 if keepalive.get("permit_without_calls", True) else 0),
+        ("grpc.http2.max_pings_without_data", 0),
+    ]
+
+def grpc_compression(config):
+    name = str(config.get("grpc_compression", "none")).lower()
+    if name not in GRPC_COMPRESSION:
+        raise ValueError(f"Unknown grpc_compression '{name}'")
+    return GRPC_COMPRESSION[name]
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
+    parser.add_argument("--config", type=str, default="config.json", help="Path of the JSON config file")
     parser.add_argument("--server_id", type=int, default=None)
     parser.add_argument("--server_host", type=str, default=None)
     parser.add_argument("--server_port", type=int, default=None)
     parser.add_argument("--initial_leader", type=lambda x: x.lower() in ('true','1','yes'), default=None)
     parser.add_argument("--join", type=lambda x: x.lower() in ('true','1','yes'), default=False,
                         help="Set to true if this server is joining an existing cluster")
-    args = parser.parse_args()
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of processes serving this node's port (SO_REUSEPORT)")
+    parser.add_argument("--role", choices=("voter", "learner"), default=None,
+                        help="learner: non-voting replica fed asynchronously by the leader")
+    args = parser.parse_args(argv)
     return args
 
-args = parse_args()
-
-with open("config.json", "r") as config_file:
-    config = json.load(config_file)
-
-if args.server_id is not None:
-    config["server_id"] = args.server_id
-if args.server_host is not None:
-    config["server_host"] = args.server_host
-if args.server_port is not None:
-    config["server_port"] = args.server_port
-if args.initial_leader is not None:
-    config["initial_leader"] = args.initial_leader
-
-if "REPLICA_ADDRESSES" in os.environ:
-    config["replica_addresses"] = json.loads(os.environ["REPLICA_ADDRESSES"])
-if "DB_FILE" in os.environ:
-    config["db_file"] = os.environ["DB_FILE"]
-else:
-    config["db_file"] = f"chat_{config['server_id']}.db"
-if "HEARTBEAT_INTERVAL" in os.environ:
-    config["heartbeat_interval"] = int(os.environ["HEARTBEAT_INTERVAL"])
-if "LEASE_TIMEOUT" in os.environ:
-    config["lease_timeout"] = int(os.environ["LEASE_TIMEOUT"])
-
-class ReplicatedChatService(chat_pb2_grpc.ChatServiceServicer):
-    def __init__(self, config):
+def load_config(argv=None, environ=None):
+    """Builds the node config from the config file, command-line flags and environment.
+
+    Used when running this file as a script; embedders pass their own dict to create_server().
+    """
+    args = parse_args(argv)
+    environ = os.environ if environ is None else environ
+    with open(args.config, "r") as config_file:
+        config = json.load(config_file)
+
+    if args.server_id is not None:
+        config["server_id"] = args.server_id
+    if args.server_host is not None:
+        config["server_host"] = args.server_host
+    if args.server_port is not None:
+        config["server_port"] = args.server_port
+    if args.initial_leader is not None:
+        config["initial_leader"] = args.initial_leader
+    if args.workers is not None:
+        config["workers"] = args.workers
+    if args.role is not None:
+        config["role"] = args.role
+    config["join"] = args.join
+
+    if "REPLICA_ADDRESSES" in environ:
+        config["replica_addresses"] = json.loads(environ["REPLICA_ADDRESSES"])
+    if "DB_FILE" in environ:
+        config["db_file"] = environ["DB_FILE"]
+    else:
+        config["db_file"] = f"chat_{config['server_id']}.db"
+    if "HEARTBEAT_INTERVAL" in environ:
+        config["heartbeat_interval"] = int(environ["HEARTBEAT_INTERVAL"])
+    if "LEASE_TIMEOUT" in environ:
+        config["lease_timeout"] = int(environ["LEASE_TIMEOUT"])
+    if "WORKERS" in environ:
+        config["workers"] = int(environ["WORKERS"])
+    return config
+
+DEFAULT_SYNC_LIMIT = 1000
+DEFAULT_CONVERSATION_LIMIT = 50
+# (snapshot JSON key, table) pairs transferred by JoinCluster and GetSnapshot.
+SNAPSHOT_TABLES = (("accounts", "accounts"), ("messages", "messages"), ("changes", "message_changes"),
+                   ("blobs", "blobs"))
+# Bodies at or above this many bytes go to the blob table; 0 keeps every body inline.
+DEFAULT_BLOB_THRESHOLD = 4096
+# Message body whether stored inline or as a blob, for queries on `messages m`.
+MESSAGE_BODY = "COALESCE(b.content, m.content)"
+BLOB_JOIN = "LEFT JOIN blobs b ON b.hash = m.content_hash"
+# Body cut to a preview length (two parameters, both the length; 0 returns full bodies).
+PREVIEW_BODY = f"CASE WHEN ? > 0 AND b.hash IS NOT NULL THEN substr(b.content, 1, ?) ELSE {MESSAGE_BODY} END"
+# Read RPCs (ChatReadHandlers) are served by every worker process; these go to the primary
+# process, which owns leadership, replication and writes.
+FORWARDED_METHODS = ("CreateAccount", "SendMessage", "ReadNewMessages", "DeleteMessages", "DeleteAccount",
+                     "Heartbeat", "Election", "ReplicateOperation", "JoinCluster", "GetSnapshot", "GetLeaderInfo",
+                     "GetMembership")
+
+def primary_address(config):
+    # Unix socket on which the primary process accepts RPCs forwarded by read workers.
+    return "unix:" + config.get("worker_socket", f"chat_{config.get('server_id', 1)}.sock")
+
+def connect_db(config, database, **kwargs):
+    conn = sqlite3.connect(database, **kwargs)
+    if config.get("tracing", {}).get("enabled", False):
+        conn = tracing.TracedConnection(conn)
+    return conn
+
+class AdminHandlers:
+    """Per-process admin RPCs: metrics export and the on-demand sampling profiler."""
+
+    def GetMetrics(self, request, context):
+        return chat_pb2.GetMetricsResponse(values=self.metrics.snapshot())
+
+    def SetProfiler(self, request, context):
+        if request.enabled:
+            interval = (request.interval_ms or 10) / 1000.0
+            if not self.profiler.start(interval):
+                return chat_pb2.SetProfilerResponse(success=False, message="Profiler already running")
+            logging.info(f"Sampling profiler started (interval {interval * 1000:.0f}ms)")
+            return chat_pb2.SetProfilerResponse(success=True, message="Profiler started")
+        path = self.profiler.stop()
+        if path is None:
+            return chat_pb2.SetProfilerResponse(success=False, message="Profiler not running")
+        logging.info(f"Sampling profiler stopped; profile written to {path}")
+        return chat_pb2.SetProfilerResponse(success=True, message="Profiler stopped", output_file=path)
+
+def add_health_service(server):
+    # grpcio-health-checking is optional; without it the standard health service is not registered.
+    # Imported here so embedding the server does not pay for it unless a server is built.
+    try:
+        from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+    except ImportError:
+        return None
+    servicer = health.HealthServicer()
+    servicer.set("", health_pb2.HealthCheckResponse.SERVING)
+    servicer.set(HEALTH_SERVICE_NAME, health_pb2.HealthCheckResponse.SERVING)
+    health_pb2_grpc.add_HealthServicer_to_server(servicer, server)
+    return servicer
+
+def install_profiler_signal(sampler):
+    # `kill -USR1 <pid>` toggles the profiler without a restart.
+    def handler(signum, frame):
+        path = sampler.toggle()
+        logging.info(f"Sampling profiler {'stopped, profile written to ' + path if path else 'started'}")
+    signal.signal(signal.SIGUSR1, handler)
+
+class ChatReadHandlers:
+    """Read-only client RPCs, shared by ReplicatedChatService and read worker processes."""
+
+    def read_cursor(self):
+        # The primary reads through its own connection; read workers override this.
+        return self.conn.cursor()
+
+    def maybe_compress_response(self, context, response):
+        # Large list responses are gzip-compressed per call, small ones are sent as-is.
+        if response.ByteSize() >= self.list_compression_threshold:
+            context.set_compression(grpc.Compression.Gzip)
+        return response
+
+    def Login(self, request, context):
+        username = request.username
+        password = request.password
+        if not username or not password:
+            return chat_pb2.LoginResponse(success=False, message="Username or password missing", unread_count=0)
+        cursor = self.read_cursor()
+        cursor.execute("SELECT password FROM accounts WHERE username=?", (username,))
+        row = cursor.fetchone()
+        if row is None:
+            return chat_pb2.LoginResponse(success=False, message="No such user", unread_count=0)
+        if row[0] != password:
+            return chat_pb2.LoginResponse(success=False, message="Incorrect password", unread_count=0)
+        cursor.execute("SELECT COUNT(*) FROM messages WHERE recipient=? AND read=0", (username,))
+        unread_count = cursor.fetchone()[0]
+        logging.info(f"User logged in: {username}")
+        return chat_pb2.LoginResponse(success=True, message=f"User '{username}' logged in successfully", unread_count=unread_count)
+
+    def ListAccounts(self, request, context):
+        pattern = request.pattern
+        cursor = self.read_cursor()
+        if pattern:
+            cursor.execute("SELECT username FROM accounts WHERE username LIKE ?", ('%'+pattern+'%',))
+        else:
+            cursor.execute("SELECT username FROM accounts")
+        accounts = [row[0] for row in cursor.fetchall()]
+        logging.info(f"Listing accounts with pattern: '{pattern}'")
+        return self.maybe_compress_response(context, chat_pb2.ListAccountsResponse(success=True, accounts=accounts))
+
+    def ListMessages(self, request, context):
+        username = request.username
+        if not username:
+            return chat_pb2.ListMessagesResponse(success=False, messages=[])
+        cursor = self.read_cursor()
+        cursor.execute(f"SELECT m.sender, {MESSAGE_BODY}, m.timestamp FROM messages m {BLOB_JOIN} "
+                       "WHERE m.recipient=? AND m.read=1", (username,))
+        rows = cursor.fetchall()
+        messages = [f"{r[2]} - From: {r[0]} - {r[1]}" for r in rows]
+        logging.info(f"Listing all read messages for user '{username}'")
+        return self.maybe_compress_response(context, chat_pb2.ListMessagesResponse(success=True, messages=messages))
+
+    def SyncMessages(self, request, context):
+        username = request.username
+        if not username:
+            return chat_pb2.SyncMessagesResponse(success=False)
+        since_id = request.since_id
+        limit = request.limit if request.limit > 0 else DEFAULT_SYNC_LIMIT
+        cursor = self.read_cursor()
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM message_changes")
+        reset = since_id > cursor.fetchone()[0]
+        if reset:
+            # The client's cursor is ahead of this replica's log, e.g. it synced against a node
+            # whose log has since been rebuilt; it must drop its cache and start over.
+            since_id = 0
+        # With preview_length set, blob bodies are cut in SQL, so long bodies are never sent whole.
+        preview_length = max(request.preview_length, 0)
+        cursor.execute(f'''
+            SELECT c.seq, c.message_id, c.deleted, m.sender, {PREVIEW_BODY}, m.timestamp, m.read, m.content_hash, length(b.content)
+            FROM message_changes c LEFT JOIN messages m ON m.id = c.message_id {BLOB_JOIN}
+            WHERE c.recipient=? AND c.seq>? ORDER BY c.seq LIMIT ?
+        ''', (preview_length, preview_length, username, since_id, limit))
+        rows = cursor.fetchall()
+        response = chat_pb2.SyncMessagesResponse(success=True, reset=reset, has_more=len(rows) == limit,
+                                                 last_id=rows[-1][0] if rows else since_id)
+        for seq, message_id, deleted, sender, content, timestamp, read, content_hash, blob_length in rows:
+            if deleted or sender is None:
+                # A client syncing from scratch has nothing to delete.
+                if since_id:
+                    response.deleted_ids.append(message_id)
+            else:
+                response.messages.add(id=message_id, sender=sender, content=content,
+                                      timestamp=timestamp, read=bool(read), content_hash=content_hash or "",
+                                      truncated=bool(preview_length and blob_length and blob_length > preview_length))
+        logging.info(f"Synced {len(response.messages)} messages and {len(response.deleted_ids)} deletions "
+                     f"for user '{username}' since {request.since_id}")
+        return self.maybe_compress_response(context, response)
+
+    def GetConversation(self, request, context):
+        if not request.user or not request.peer:
+            return chat_pb2.GetConversationResponse(success=False, message="User and peer required")
+        limit = min(request.limit if request.limit > 0 else DEFAULT_CONVERSATION_LIMIT, DEFAULT_SYNC_LIMIT)
+        preview_length = max(request.preview_length, 0)
+        where, params = "m.conversation=?", [db_schema.conversation_key(request.user, request.peer)]
+        if request.before:
+            # (created_at, id) cursor, so messages sharing a millisecond are not skipped between pages.
+            # A row-value comparison lets SQLite seek the index to the cursor instead of filtering.
+            where += " AND (m.created_at, m.id) < (?, ?)"
+            params += [request.before, request.before_id]
+        # Walks idx_messages_conversation backwards from the cursor; one extra row tells whether
+        # older messages remain.
+        cursor = self.read_cursor()
+        cursor.execute(f'''
+            SELECT m.id, m.sender, m.recipient, {PREVIEW_BODY}, m.created_at, m.read, m.content_hash,
+                   length(b.content)
+            FROM messages m {BLOB_JOIN}
+            WHERE {where} ORDER BY m.created_at DESC, m.id DESC LIMIT ?
+        ''', [preview_length, preview_length] + params + [limit + 1])
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        response = chat_pb2.GetConversationResponse(success=True, has_more=has_more)
+        if rows:
+            response.next_before, response.next_before_id = rows[-1][4], rows[-1][0]
+        for message_id, sender, recipient, content, created_at, read, content_hash, blob_length in reversed(rows):
+            response.messages.add(id=message_id, sender=sender, recipient=recipient, content=content,
+                                  created_at=created_at, read=bool(read), content_hash=content_hash or "",
+                                  truncated=bool(preview_length and blob_length and blob_length > preview_length))
+        return self.maybe_compress_response(context, response)
+
+    def GetBlob(self, request, context):
+        cursor = self.read_cursor()
+        cursor.execute("SELECT content FROM blobs WHERE hash=?", (request.hash,))
+        row = cursor.fetchone()
+        if row is None:
+            return chat_pb2.GetBlobResponse(success=False, message="No such blob")
+        return self.maybe_compress_response(context, chat_pb2.GetBlobResponse(success=True, content=row[0]))
+
+class ReplicatedChatService(ChatReadHandlers, AdminHandlers, chat_pb2_grpc.ChatServiceServicer):
+    def __init__(self, config, channel_interceptor_factory=None):
         self.config = config
         self.server_id = config.get("server_id", 1)
         self.is_leader = config.get("initial_leader", False)
+        # Learners receive the replication stream asynchronously and never vote or lead.
+        self.is_learner = config.get("role", "voter") == "learner"
+        if self.is_learner:
+            self.is_leader = False
         # Initialize runtime replica list from config.
         self.replica_addresses = config.get("replica_addresses", []).copy()
+        self.learner_addresses = config.get("learner_addresses", []).copy()
         self.heartbeat_interval = config.get("heartbeat_interval", 3)
         self.lease_timeout = config.get("lease_timeout", 10)
+        # How often followers check the lease, and the random delay before standing for election.
+        self.election_tick = config.get("election_tick", 1)
+        self.election_backoff = config.get("election_backoff", 2)
+        self.peer_rpc_timeout = config.get("peer_rpc_timeout", 2)
+        # Incremented on every election win so a heartbeat loop from an earlier term stops.
+        self.leader_term = 0
+        self.stop_event = threading.Event()
         self.last_heartbeat = time.time()
         self.current_leader_address = None
 
         self.my_address = f"{config.get('server_host', 'localhost')}:{config.get('server_port', 50051)}"
 
+        # Compression: gRPC-level for all channels, per-payload for replication batches and snapshots.
+        self.payload_compression = payload_codec.resolve_encoding(config.get("payload_compression", "none"))
+        self.payload_compression_threshold = config.get("payload_compression_threshold", 1024)
+        self.list_compression_threshold = config.get("list_compression_threshold", 64 * 1024)
+        self.blob_threshold = config.get("blob_threshold", DEFAULT_BLOB_THRESHOLD)
+        # Blob hashes each follower is known to store, most recent last, so replication can leave
+        # those bodies out. A follower that dropped one reports it in missing_blobs.
+        self.peer_blobs = collections.defaultdict(collections.OrderedDict)
+        self.peer_blobs_lock = threading.Lock()
+        self.peer_blobs_size = config.get("peer_blobs_size", 10000)
+        self.metrics = metrics.MetricsRegistry()
+        self.profiler = profiler.StackSampler(config.get("profiler_dir", "."), f"profile_{self.server_id}")
+        self.peer_encodings = {}
+        self.stubs = {}
+        self.channels = []
+        self.stubs_lock = threading.Lock()
+        # Optional factory(src, dst) returning a client interceptor for peer channels, used by
+        # tests to inject latency, drops and partitions.
+        self.channel_interceptor_factory = channel_interceptor_factory
+        # Set by create_server() when the health service is registered.
+        self.health_servicer = None
+
+        # Operations are applied through the same handlers on the leader and on followers.
+        self.write_lock = threading.RLock()
+        # Every applied batch gets a replication index; the most recent ones are kept in memory
+        # to catch up learners and snapshot-bootstrapped joiners.
+        self.replication_cv = threading.Condition(self.write_lock)
+        self.replication_log = collections.deque(maxlen=config.get("replication_log_size", 10000))
+        self.learner_batch_size = config.get("learner_batch_size", 100)
+        self.snapshot_max_lag = config.get("snapshot_max_lag", 100)
+        self.learner_replicators = set()
+        self.applied_index = 0
+        # Membership (leader, voters, learners) is versioned. WatchMembership streams wait on
+        # membership_cv and send the lists when the version changes. Each open stream holds a
+        # server thread, so at most max_watchers are accepted; other clients poll GetMembership.
+        self.membership_cv = threading.Condition()
+        self.membership_version = 1
+        self.watchers = 0
+        self.max_watchers = config.get("max_watchers", config.get("max_workers", 10) // 2)
+        self.watch_timeout = config.get("watch_timeout", 300)
+        # Batches at or below this index are already contained in the snapshot this node joined with.
+        self.join_index = 0
+        # Leader whose batches this node last accepted, and whether a full state reload from a new
+        # leader is under way (see ReplicateOperation).
+        self.replication_leader = None
+        self.resyncing = False
+        self.op_handlers = {
+            "create_account": self.apply_create_account,
+            "send_message": self.apply_send_message,
+            "delete_messages": self.apply_delete_messages,
+            "delete_account": self.apply_delete_account,
+            "mark_read": self.apply_mark_read,
+        }
+
         self.db_file = config.get("db_file", f"chat_{self.server_id}.db")
-        self.conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self.conn = connect_db(config, self.db_file, check_same_thread=False)
         self.cursor = self.conn.cursor()
         self.initialize_db()
 
+    def start(self):
+        # Starts the background loops; call once the gRPC server is serving, so peers that
+        # respond to the join or first heartbeat can reach this node.
+        # The monitor also runs on the leader so it can stand for election again after stepping down.
+        threading.Thread(target=self.election_monitor_loop, daemon=True).start()
         if self.is_leader:
-            threading.Thread(target=self.send_heartbeat_loop, daemon=True).start()
-        else:
-            threading.Thread(target=self.election_monitor_loop, daemon=True).start()
-            if args.join:
-                self.join_cluster()
+            self.become_leader()
+        elif self.config.get("join", False) or self.is_learner:
+            self.join_cluster()
+
+    def stop(self):
+        # Ends the background loops and closes peer channels; the gRPC server is stopped by the caller.
+        self.stop_event.set()
+        self.is_leader = False
+        with self.replication_cv:
+            self.replication_cv.notify_all()
+        with self.membership_cv:
+            self.membership_cv.notify_all()
+        with self.stubs_lock:
+            for channel in self.channels:
+                channel.close()
+            self.channels = []
+            self.stubs = {}
+        with self.write_lock:
+            self.conn.close()
 
     def initialize_db(self):
-       
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS accounts (
-                username TEXT PRIMARY KEY,
-                password TEXT NOT NULL
-            )
-        ''')
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sender TEXT,
-                recipient TEXT,
-                content TEXT,
-                read INTEGER DEFAULT 0,
-                timestamp TEXT
-            )
-        ''')
+        # WAL lets read worker processes query the database while this process writes.
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        db_schema.create_schema(self.cursor)
+        db_schema.upgrade_data(self.cursor)
+        db_schema.backfill_change_log(self.cursor)
+        self.cursor.execute("SELECT value FROM replication_state WHERE key='applied_index'")
+        row = self.cursor.fetchone()
+        self.applied_index = row[0] if row else 0
         self.conn.commit()
 
-    def send_heartbeat_loop(self):
+    def send_heartbeat_loop(self, term):
         
-        while True:
-            for addr in self.replica_addresses:
+        while self.is_leader and self.leader_term == term and not self.stop_event.is_set():
+            for addr in self.replica_addresses + self.learner_addresses:
                 if addr == self.my_address:
                     continue
                 try:
-                    channel = grpc.insecure_channel(addr)
-                    stub = chat_pb2_grpc.ChatServiceStub(channel)
+                    stub = self.get_stub(addr)
                     req = chat_pb2.HeartbeatRequest(
                         leader_id=self.server_id,
                         timestamp=int(time.time()),
-                        leader_address=self.my_address
+                        leader_address=self.my_address,
+                        learner_addresses=self.learner_addresses,
+                        applied_index=self.applied_index
                     )
-                    stub.Heartbeat(req, timeout=2)
+                    resp = stub.Heartbeat(req, timeout=self.peer_rpc_timeout)
+                    self.peer_encodings[addr] = set(resp.accept_encodings)
                 except Exception as e:
                     logging.error(f"Heartbeat to {addr} failed: {e}")
             logging.info(f"[Server Heartbeat] Current replica list: {self.replica_addresses}")
-            time.sleep(self.heartbeat_interval)
+            self.stop_event.wait(self.heartbeat_interval)
 
     def election_monitor_loop(self):
        
-        while True:
-            if time.time() - self.last_heartbeat > self.lease_timeout:
-                logging.info("Lease expired; starting election process.")
-                self.start_election()
-            time.sleep(1)
+        while not self.stop_event.is_set():
+            if not self.is_leader and time.time() - self.last_heartbeat > self.lease_timeout:
+                if self.is_learner:
+                    # Learners never stand for election; they re-register with whoever leads now.
+                    logging.info("Lease expired; rejoining the cluster as a learner.")
+                    self.last_heartbeat = time.time()
+                    self.join_cluster()
+                else:
+                    logging.info("Lease expired; starting election process.")
+                    self.start_election()
+            self.stop_event.wait(self.election_tick)
 
     def start_election(self):
         
-        backoff = random.uniform(0, 2)
-        time.sleep(backoff)
+        backoff = random.uniform(0, self.election_backoff)
+        if self.stop_event.wait(backoff):
+            return
+        if time.time() - self.last_heartbeat <= self.lease_timeout:
+            logging.info("Heartbeat received during election backoff; remaining as follower.")
+            return
         candidate_id = self.server_id
         lower_id_found = False
         for addr in self.replica_addresses:
             try:
-                channel = grpc.insecure_channel(addr)
-                stub = chat_pb2_grpc.ChatServiceStub(channel)
+                stub = self.get_stub(addr)
                 req = chat_pb2.ElectionRequest(candidate_id=candidate_id)
-                resp = stub.Election(req, timeout=2)
+                resp = stub.Election(req, timeout=self.peer_rpc_timeout)
                 if not resp.vote_granted:
                     lower_id_found = True
                     break
             except Exception as e:
                 logging.error(f"Election RPC to {addr} failed: {e}")
         if not lower_id_found:
-            self.is_leader = True
             logging.info("Elected as new leader.")
-            threading.Thread(target=self.send_heartbeat_loop, daemon=True).start()
+            self.become_leader()
         else:
             logging.info("Election lost; remaining as follower.")
 
+    def become_leader(self):
+        self.leader_term += 1
+        self.is_leader = True
+        self.membership_changed()
+        threading.Thread(target=self.send_heartbeat_loop, args=(self.leader_term,), daemon=True).start()
+        # Learners report their applied index on the first mismatch, so starting at our own
+        # index is safe even if a learner is behind.
+        for addr in self.learner_addresses:
+            self.start_learner_replication(addr, self.applied_index + 1)
+
     def Heartbeat(self, request, context):
        
+        if self.is_leader:
+            # Two leaders after a partition heals: the one that applied more batches (normally
+            # the majority side, which kept taking writes) keeps leading; the lower id breaks ties.
+            if (request.applied_index, -request.leader_id) < (self.applied_index, -self.server_id):
+                return chat_pb2.HeartbeatResponse(success=False, accept_encodings=payload_codec.available_encodings())
+            logging.info(f"Stepping down: leader {request.leader_address} is at index {request.applied_index} "
+                         f"(ours {self.applied_index}).")
+            self.is_leader = False
+            # Batches we applied alone while cut off were never replicated, and our message ids
+            # may clash with the other leader's, so its state replaces ours.
+            with self.write_lock:
+                self.start_resync(request.leader_address)
         self.last_heartbeat = time.time()
-        self.current_leader_address = request.leader_address
-        return chat_pb2.HeartbeatResponse(success=True)
+        learners = list(request.learner_addresses)
+        if request.leader_address != self.current_leader_address or learners != self.learner_addresses:
+            self.current_leader_address = request.leader_address
+            self.learner_addresses = learners
+            self.membership_changed()
+        return chat_pb2.HeartbeatResponse(success=True, accept_encodings=payload_codec.available_encodings())
 
     def Election(self, request, context):
         candidate_id = request.candidate_id
-        vote = True if self.server_id >= candidate_id else False
+        vote = True if self.is_learner or self.server_id >= candidate_id else False
         return chat_pb2.ElectionResponse(vote_granted=vote)
 
     def ReplicateOperation(self, request, context):
-        op_type = request.operation_type
-        data = json.loads(request.data)
         try:
-            if op_type == "create_account":
-                self.cursor.execute("INSERT INTO accounts (username, password) VALUES (?,?)",
-                                    (data["username"], data["password"]))
-            elif op_type == "send_message":
-                self.cursor.execute("INSERT INTO messages (sender, recipient, content, read, timestamp) VALUES (?,?,?,?,?)",
-                                    (data["sender"], data["recipient"], data["content"], 0, data["timestamp"]))
-            elif op_type == "delete_messages":
-                for msg_id in data["message_ids"]:
-                    self.cursor.execute("DELETE FROM messages WHERE id=?", (msg_id,))
-            elif op_type == "delete_account":
-                self.cursor.execute("DELETE FROM accounts WHERE username=?", (data["username"],))
-                self.cursor.execute("DELETE FROM messages WHERE recipient=?", (data["username"],))
-            self.conn.commit()
-            return chat_pb2.ReplicationResponse(success=True)
+            batch = self.decode_batch(request)
+            with self.write_lock:
+                if self.resyncing:
+                    return chat_pb2.ReplicationResponse(success=False, message="Reloading state from the leader",
+                                                        applied_index=self.applied_index)
+                if request.index and request.index <= self.join_index:
+                    return chat_pb2.ReplicationResponse(success=True, applied_index=self.applied_index)
+                if (not self.is_learner and request.leader_address
+                        and request.leader_address != self.replication_leader):
+                    if request.prev_index < self.applied_index:
+                        # A new leader that never had our latest batches; they came from the previous
+                        # leader only and may conflict with the new leader's, so its state replaces ours.
+                        self.start_resync(request.leader_address)
+                        return chat_pb2.ReplicationResponse(success=False, message="Reloading state from the leader",
+                                                            applied_index=self.applied_index)
+                    self.replication_leader = request.leader_address
+                if request.index and request.prev_index != self.applied_index:
+                    # Concurrent writes may be replicated out of order, so a voter can already have
+                    # applied this batch as part of a catch-up.
+                    if not self.is_learner and request.index <= self.applied_index:
+                        return chat_pb2.ReplicationResponse(success=True, applied_index=self.applied_index)
+                    # A gap: the leader resends from the index we report, so applied_index only
+                    # ever covers a contiguous prefix of the log.
+                    return chat_pb2.ReplicationResponse(success=False, message="Replication index mismatch",
+                                                        applied_index=self.applied_index)
+                missing = self.missing_blobs(batch)
+                if missing:
+                    return chat_pb2.ReplicationResponse(success=False, message="Missing blobs", missing_blobs=missing,
+                                                        applied_index=self.applied_index)
+                self.apply_batch(batch, request.index or None)
+                return chat_pb2.ReplicationResponse(success=True, applied_index=self.applied_index)
         except Exception as e:
             logging.error(f"Replication operation failed: {e}")
-            return chat_pb2.ReplicationResponse(success=False, message=str(e))
+            return chat_pb2.ReplicationResponse(success=False, message=str(e), applied_index=self.applied_index)
+
+    def missing_blobs(self, batch):
+        # Hashes referenced without a body that neither this database nor the batch itself holds.
+        carried = {op.send_message.content_hash for op in batch.operations
+                   if op.WhichOneof("op") == "send_message" and op.send_message.content}
+        missing = []
+        for op in batch.operations:
+            if op.WhichOneof("op") != "send_message":
+                continue
+            content_hash = op.send_message.content_hash
+            if content_hash and not op.send_message.content and content_hash not in carried:
+                self.cursor.execute("SELECT 1 FROM blobs WHERE hash=?", (content_hash,))
+                if self.cursor.fetchone() is None and content_hash not in missing:
+                    missing.append(content_hash)
+        return missing
+
+    def decode_batch(self, request):
+        if request.encoding:
+            return chat_pb2.OperationBatch.FromString(payload_codec.decompress(request.payload, request.encoding))
+        return request.batch
+
+    def apply_batch(self, batch, index=None):
+        # Applies all operations in one transaction; the whole batch is rolled back on error.
+        # Returns the batch's replication index (assigned here on the leader), or None for
+        # local-only changes.
+        with self.write_lock:
+            if index is not None and index <= self.join_index:
+                return index
+            if index is None and self.is_leader:
+                index = self.applied_index + 1
+            cursor = self.conn.cursor()
+            try:
+                for op in batch.operations:
+                    kind = op.WhichOneof("op")
+                    self.op_handlers[kind](cursor, getattr(op, kind))
+                if index is not None and index > self.applied_index:
+                    cursor.execute("INSERT OR REPLACE INTO replication_state (key, value) VALUES ('applied_index', ?)",
+                                   (index,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            if index is not None and index > self.applied_index:
+                self.applied_index = index
+                self.replication_log.append((index, batch))
+                self.replication_cv.notify_all()
+            return index
+
+    def apply_create_account(self, cursor, op):
+        cursor.execute("INSERT INTO accounts (username, password) VALUES (?,?)", (op.username, op.password))
+
+    def apply_send_message(self, cursor, op):
+        if not op.created_at:
+            op.created_at = int(time.time() * 1000)
+        content = op.content
+        if op.content_hash:
+            # One blob row per distinct body; the message row keeps only the hash.
+            if op.content:
+                cursor.execute("INSERT INTO blobs (hash, content, refcount) VALUES (?, ?, 1) "
+                               "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1", (op.content_hash, op.content))
+            else:
+                cursor.execute("UPDATE blobs SET refcount = refcount + 1 WHERE hash=?", (op.content_hash,))
+                if cursor.rowcount == 0:
+                    raise ValueError(f"Missing blob {op.content_hash}")
+            content = None
+        conversation = db_schema.conversation_key(op.sender, op.recipient)
+        if op.id:
+            cursor.execute("INSERT INTO messages (id, sender, recipient, content, read, timestamp, content_hash, "
+                           "created_at, conversation) VALUES (?,?,?,?,?,?,?,?,?)",
+                           (op.id, op.sender, op.recipient, content, 0, op.timestamp, op.content_hash or None,
+                            op.created_at, conversation))
+        else:
+            cursor.execute("INSERT INTO messages (sender, recipient, content, read, timestamp, content_hash, "
+                           "created_at, conversation) VALUES (?,?,?,?,?,?,?,?)",
+                           (op.sender, op.recipient, content, 0, op.timestamp, op.content_hash or None,
+                            op.created_at, conversation))
+            # The leader records the assigned id so followers insert the same row.
+            op.id = cursor.lastrowid
+        self.record_changes(cursor, op, "id=?", (op.id,), deleted=0)
+
+    def apply_delete_messages(self, cursor, op):
+        if len(op.message_ids) == 1 and op.message_ids[0] == -1:
+            where, params = "recipient=?", (op.username,)
+        else:
+            where, params = "recipient=? AND id IN (SELECT value FROM json_each(?))", \
+                (op.username, json.dumps(list(op.message_ids)))
+        self.record_changes(cursor, op, where, params, deleted=1)
+        self.release_blobs(cursor, where, params)
+        cursor.execute(f"DELETE FROM messages WHERE {where}", params)
+
+    def apply_delete_account(self, cursor, op):
+        cursor.execute("DELETE FROM accounts WHERE username=?", (op.username,))
+        self.release_blobs(cursor, "recipient=?", (op.username,))
+        cursor.execute("DELETE FROM messages WHERE recipient=?", (op.username,))
+        cursor.execute("DELETE FROM message_changes WHERE recipient=?", (op.username,))
+
+    def apply_mark_read(self, cursor, op):
+        where, params = "recipient=? AND id IN (SELECT value FROM json_each(?))", \
+            (op.username, json.dumps(list(op.message_ids)))
+        cursor.execute(f"UPDATE messages SET read=1 WHERE {where}", params)
+        self.record_changes(cursor, op, where, params, deleted=0)
+
+    def release_blobs(self, cursor, where, params):
+        # Called before deleting the messages matching `where`; drops blobs no message references.
+        cursor.execute(f"UPDATE blobs SET refcount = refcount - (SELECT COUNT(*) FROM messages "
+                       f"WHERE content_hash = blobs.hash AND {where}) "
+                       f"WHERE hash IN (SELECT content_hash FROM messages WHERE {where})", tuple(params) * 2)
+        if cursor.rowcount:
+            cursor.execute("DELETE FROM blobs WHERE refcount <= 0")
+
+    def record_changes(self, cursor, op, where, params, deleted):
+        # The new change supersedes any earlier log row for the same message, keeping the log
+        # at one row per message. The leader takes the next seqs from the AUTOINCREMENT counter
+        # and records the first in op.change_seq; followers insert the same seqs, since their
+        # own counters need not match (e.g. after joining from a snapshot).
+        cursor.execute(f"SELECT id, recipient FROM messages WHERE {where} ORDER BY id", params)
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        cursor.execute(f"DELETE FROM message_changes WHERE message_id IN (SELECT id FROM messages WHERE {where})",
+                       params)
+        if not op.change_seq:
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name='message_changes'")
+            row = cursor.fetchone()
+            op.change_seq = (row[0] if row else 0) + 1
+        cursor.executemany("INSERT INTO message_changes (seq, message_id, recipient, deleted) VALUES (?,?,?,?)",
+                           [(op.change_seq + i, message_id, recipient, deleted)
+                            for i, (message_id, recipient) in enumerate(rows)])
+
+    def join_candidates(self):
+        # Nodes asked for the leader when joining: "join_addresses" if configured, otherwise the
+        # instances listed in the launcher's master config.
+        if "join_addresses" in self.config:
+            return list(self.config["join_addresses"])
+        with open(self.config.get("master_config", "config_master.json"), "r") as f:
+            master_config = json.load(f)
+        return [f"{instance['server_host']}:{instance['server_port']}"
+                for instance in master_config.get("instances", [])]
 
     def join_cluster(self):
         
         try:
-            with open("config_master.json", "r") as f:
-                master_config = json.load(f)
-            instances = master_config.get("instances", [])
-            candidate_addresses = []
-            for instance in instances:
-                addr = f"{instance['server_host']}:{instance['server_port']}"
-                candidate_addresses.append(addr)
-            def query_addr(addr):
-                try:
-                    channel = grpc.insecure_channel(addr)
-                    stub = chat_pb2_grpc.ChatServiceStub(channel)
-                    resp = stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=2)
-                    return addr, resp
-                except Exception as ex:
-                    return addr, None
-            with ThreadPoolExecutor(max_workers=len(candidate_addresses)) as executor:
-                futures = {executor.submit(query_addr, addr): addr for addr in candidate_addresses}
-                for future in as_completed(futures, timeout=5):
-                    addr, resp = future.result()
-                    if resp and resp.success and resp.leader_address and resp.leader_address != "Unknown":
-                        logging.info(f"Found leader at {resp.leader_address} via candidate {addr}")
-                        self.current_leader_address = resp.leader_address
-                        if resp.replica_addresses:
-                            self.replica_addresses = list(set(self.replica_addresses) | set(resp.replica_addresses))
-                        break
-            if not self.current_leader_address:
+            candidate_addresses = self.join_candidates()
+            infos = self.query_leader_info(candidate_addresses)
+            leader_info = None
+            for addr, resp in infos.items():
+                if resp.leader_address and resp.leader_address != "Unknown":
+                    logging.info(f"Found leader at {resp.leader_address} via candidate {addr}")
+                    leader_info = resp
+                    break
+            if leader_info is None:
                 logging.error("No leader found among candidate addresses.")
                 return
-            channel = grpc.insecure_channel(self.current_leader_address)
-            stub = chat_pb2_grpc.ChatServiceStub(channel)
-            req = chat_pb2.JoinClusterRequest(new_server_address=self.my_address)
-            resp = stub.JoinCluster(req, timeout=3)
-            if resp.success:
-                logging.info("Successfully joined cluster. State transferred.")
+            self.current_leader_address = leader_info.leader_address
+            if leader_info.replica_addresses:
+                self.replica_addresses = list(set(self.replica_addresses) | set(leader_info.replica_addresses))
+            if self.is_learner and self.my_address in self.replica_addresses:
+                self.replica_addresses.remove(self.my_address)
+            self.learner_addresses = list(leader_info.learner_addresses)
+            peers = set(self.replica_addresses) | set(self.learner_addresses) | {self.current_leader_address}
+            infos.update(self.query_leader_info([a for a in peers if a not in infos and a != self.my_address]))
+            source = self.choose_snapshot_source(infos)
+
+            # Held until the catch-up is applied so replicated batches arriving meanwhile wait
+            # and are then skipped or applied on top of the snapshot.
+            with self.write_lock:
+                has_snapshot = False
+                if source != self.current_leader_address:
+                    try:
+                        snapshot = self.get_stub(source).GetSnapshot(
+                            chat_pb2.GetSnapshotRequest(accept_encodings=payload_codec.available_encodings()),
+                            timeout=self.config.get("snapshot_timeout", 30))
+                        if snapshot.success:
+                            self.load_snapshot(snapshot)
+                            has_snapshot = True
+                            logging.info(f"Loaded snapshot at index {snapshot.applied_index} from {source}")
+                    except Exception as e:
+                        logging.warning(f"Snapshot from {source} failed, falling back to the leader: {e}")
+                stub = self.get_stub(self.current_leader_address)
+                req = chat_pb2.JoinClusterRequest(new_server_address=self.my_address,
+                                                  accept_encodings=payload_codec.available_encodings(),
+                                                  learner=self.is_learner,
+                                                  has_snapshot=has_snapshot,
+                                                  snapshot_index=self.applied_index)
+                resp = stub.JoinCluster(req, timeout=self.config.get("snapshot_timeout", 30))
+                if not resp.success:
+                    logging.error("Failed to join cluster: " + resp.message)
+                    return
+                if resp.state or resp.encoding:
+                    self.load_snapshot(resp)
+                    logging.info("Successfully joined cluster. State transferred.")
+                else:
+                    for entry in resp.catchup:
+                        self.apply_batch(self.decode_batch(entry), entry.index)
+                    logging.info(f"Successfully joined cluster. Caught up with {len(resp.catchup)} log entries.")
+                self.join_index = self.applied_index
+                self.replication_leader = self.current_leader_address
                 self.last_heartbeat = time.time()
-                state = json.loads(resp.state)
-                accounts = state.get("accounts", [])
-                messages = state.get("messages", [])
-                self.cursor.execute("DELETE FROM accounts")
-                self.cursor.execute("DELETE FROM messages")
-                for account in accounts:
-                    self.cursor.execute("INSERT INTO accounts (username, password) VALUES (?, ?)",
-                                        (account["username"], account["password"]))
-                for message in messages:
-                    self.cursor.execute("INSERT INTO messages (sender, recipient, content, read, timestamp) VALUES (?, ?, ?, ?, ?)",
-                                        (message["sender"], message["recipient"], message["content"], message["read"], message["timestamp"]))
-                self.conn.commit()
+                self.membership_changed()
                 logging.info(f"[JoinCluster] Updated runtime replica list: {self.replica_addresses}")
-            else:
-                logging.error("Failed to join cluster: " + resp.message)
         except Exception as e:
             logging.error("JoinCluster RPC failed: " + str(e))
 
+    def start_resync(self, leader_address):
+        # Called with write_lock held; batches are refused until the reload finishes.
+        if self.resyncing:
+            return
+        self.resyncing = True
+        threading.Thread(target=self.resync_from_leader, args=(leader_address,), daemon=True).start()
+
+    def resync_from_leader(self, leader_address):
+        # Replaces this node's state with a full copy of the leader's, for a node that may hold
+        # batches the leader never had.
+        try:
+            with self.write_lock:
+                logging.warning(f"Reloading state from leader {leader_address}.")
+                resp = self.get_stub(leader_address).JoinCluster(
+                    chat_pb2.JoinClusterRequest(new_server_address=self.my_address, learner=self.is_learner,
+                                                accept_encodings=payload_codec.available_encodings()),
+                    timeout=self.config.get("snapshot_timeout", 30))
+                if not resp.success:
+                    logging.error("State reload failed: " + resp.message)
+                    return
+                self.load_snapshot(resp)
+                self.replication_leader = leader_address
+                self.metrics.inc("state_reloads")
+        except Exception as e:
+            logging.error(f"State reload from {leader_address} failed: {e}")
+        finally:
+            self.resyncing = False
+
+    def query_leader_info(self, addresses):
+        def query_addr(addr):
+            try:
+                stub = self.get_stub(addr)
+                resp = stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=self.peer_rpc_timeout)
+                return addr, resp
+            except Exception as ex:
+                return addr, None
+        infos = {}
+        if not addresses:
+            return infos
+        with ThreadPoolExecutor(max_workers=len(addresses)) as executor:
+            futures = [executor.submit(query_addr, addr) for addr in addresses]
+            for future in as_completed(futures, timeout=5):
+                addr, resp = future.result()
+                if resp and resp.success:
+                    infos[addr] = resp
+        return infos
+
+    def choose_snapshot_source(self, infos):
+        # Prefer the most caught-up non-leader so bootstrapping does not load the leader; the
+        # leader's log covers whatever the snapshot is missing.
+        leader = self.current_leader_address
+        leader_index = infos[leader].applied_index if leader in infos else 0
+        best = None
+        for addr, resp in infos.items():
+            if addr in (leader, self.my_address) or resp.applied_index < leader_index - self.snapshot_max_lag:
+                continue
+            if best is None or resp.applied_index > infos[best].applied_index:
+                best = addr
+        return best or leader
+
+    def snapshot_state(self):
+        with self.write_lock:
+            cursor = self.conn.cursor()
+            # AUTOINCREMENT high-water marks, so a joiner that later leads does not reuse the
+            # message ids or change seqs of rows deleted before the snapshot.
+            cursor.execute("SELECT name, seq FROM sqlite_sequence")
+            state = {"applied_index": self.applied_index, "sequences": dict(cursor.fetchall())}
+            for key, table in SNAPSHOT_TABLES:
+                columns = db_schema.TABLES[table]
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table}")
+                state[key] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return state
+
+    def encode_state(self, state, accept_encodings):
+        # Fields shared by JoinClusterResponse and GetSnapshotResponse.
+        state = json.dumps(state)
+        encoding = payload_codec.IDENTITY
+        if len(state) >= self.payload_compression_threshold:
+            encoding = payload_codec.negotiate(self.payload_compression, accept_encodings)
+        if encoding != payload_codec.IDENTITY:
+            return {"compressed_state": payload_codec.compress(state.encode(), encoding), "encoding": encoding}
+        return {"state": state}
+
+    def load_snapshot(self, response):
+        if response.encoding:
+            state = json.loads(payload_codec.decompress(response.compressed_state, response.encoding))
+        else:
+            state = json.loads(response.state)
+        applied_index = state.get("applied_index", 0)
+        with self.write_lock:
+            cursor = self.conn.cursor()
+            try:
+                for key, table in SNAPSHOT_TABLES:
+                    columns = db_schema.TABLES[table]
+                    cursor.execute(f"DELETE FROM {table}")
+                    cursor.executemany(db_schema.insert_statement(table),
+                                       [tuple(row.get(c) for c in columns) for row in state.get(key, [])])
+                for name, seq in state.get("sequences", {}).items():
+                    cursor.execute("DELETE FROM sqlite_sequence WHERE name=?", (name,))
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, seq))
+                cursor.execute("INSERT OR REPLACE INTO replication_state (key, value) VALUES ('applied_index', ?)",
+                               (applied_index,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.applied_index = applied_index
+            self.join_index = applied_index
+            self.replication_log.clear()
+
+    def log_entries_after(self, index):
+        # Log entries with a higher index, or None if the in-memory log no longer reaches back that far.
+        with self.write_lock:
+            if index >= self.applied_index:
+                return []
+            if not self.replication_log or self.replication_log[0][0] > index + 1:
+                return None
+            return [(i, batch) for i, batch in self.replication_log if i > index]
+
     def JoinCluster(self, request, context):
         new_server_address = request.new_server_address
-        if new_server_address and new_server_address not in self.replica_addresses:
-            self.replica_addresses.append(new_server_address)
-            logging.info(f"New server {new_server_address} registered.")
-        self.cursor.execute("SELECT username, password FROM accounts")
-        accounts = [{"username": row[0], "password": row[1]} for row in self.cursor.fetchall()]
-        self.cursor.execute("SELECT id, sender, recipient, content, read, timestamp FROM messages")
-        messages = [{"id": row[0], "sender": row[1], "recipient": row[2], "content": row[3],
-                     "read": row[4], "timestamp": row[5]} for row in self.cursor.fetchall()]
-        state = {"accounts": accounts, "messages": messages}
+        with self.write_lock:
+            if new_server_address:
+                self.peer_encodings[new_server_address] = set(request.accept_encodings)
+                if request.learner:
+                    if new_server_address in self.replica_addresses:
+                        self.replica_addresses.remove(new_server_address)
+                    if new_server_address not in self.learner_addresses:
+                        self.learner_addresses.append(new_server_address)
+                        logging.info(f"New learner {new_server_address} registered.")
+                elif new_server_address not in self.replica_addresses:
+                    self.replica_addresses.append(new_server_address)
+                    logging.info(f"New server {new_server_address} registered.")
+            entries = self.log_entries_after(request.snapshot_index) if request.has_snapshot else None
+            if entries is not None:
+                # The joiner loaded a snapshot elsewhere; only the log entries it is missing are sent.
+                catchup = [self.build_replication_request(batch, payload_codec.IDENTITY, i, i - 1)
+                           for i, batch in entries]
+                response = chat_pb2.JoinClusterResponse(success=True, message="Caught up from replication log",
+                                                        catchup=catchup, leader_index=self.applied_index)
+            else:
+                response = chat_pb2.JoinClusterResponse(
+                    success=True, message="State transfer complete", leader_index=self.applied_index,
+                    **self.encode_state(self.snapshot_state(), request.accept_encodings))
+            if request.learner and new_server_address:
+                self.start_learner_replication(new_server_address, self.applied_index + 1)
+        self.membership_changed()
         logging.info(f"[JoinCluster RPC] Returning runtime replica list: {self.replica_addresses}")
-        return chat_pb2.JoinClusterResponse(success=True, state=json.dumps(state), message="State transfer complete")
+        return response
+
+    def GetSnapshot(self, request, context):
+        state = self.snapshot_state()
+        return chat_pb2.GetSnapshotResponse(success=True, applied_index=state["applied_index"],
+                                            **self.encode_state(state, request.accept_encodings))
 
     def GetLeaderInfo(self, request, context):
         if self.is_leader:
-            logging.info(f"[GetLeaderInfo] Leader replica list: {self.replica_addresses}")
+            logging.debug(f"[GetLeaderInfo] Leader replica list: {self.replica_addresses}")
             return chat_pb2.GetLeaderInfoResponse(
                 success=True,
                 leader_address=self.my_address,
                 message="I am leader",
-                replica_addresses=self.replica_addresses
+                replica_addresses=self.replica_addresses,
+                learner_addresses=self.learner_addresses,
+                applied_index=self.applied_index
             )
         else:
             addr = self.current_leader_address if self.current_leader_address else "Unknown"
-            logging.info(f"[GetLeaderInfo] Follower replica list: {self.replica_addresses}")
+            logging.debug(f"[GetLeaderInfo] Follower replica list: {self.replica_addresses}")
             return chat_pb2.GetLeaderInfoResponse(
                 success=True,
                 leader_address=addr,
                 message="Follower reporting leader info",
-                replica_addresses=self.replica_addresses
+                replica_addresses=self.replica_addresses,
+                learner_addresses=self.learner_addresses,
+                applied_index=self.applied_index,
+                is_learner=self.is_learner
             )
 
-    def replicate_to_followers(self, op_type, data):
-        req = chat_pb2.ReplicationRequest(operation_type=op_type, data=json.dumps(data))
+    def membership_changed(self):
+        with self.membership_cv:
+            self.membership_version += 1
+            self.membership_cv.notify_all()
+
+    def membership_update(self, version):
+        leader = self.my_address if self.is_leader else (self.current_leader_address or "")
+        return chat_pb2.MembershipUpdate(version=version, leader_address=leader,
+                                         replica_addresses=self.replica_addresses,
+                                         learner_addresses=self.learner_addresses)
+
+    def GetMembership(self, request, context):
+        # Polled by clients that have no watch open, so an unchanged membership costs one
+        # small response.
+        with self.membership_cv:
+            version = self.membership_version
+        if request.known_version == version:
+            return chat_pb2.MembershipUpdate(version=version)
+        return self.membership_update(version)
+
+    def WatchMembership(self, request, context):
+        with self.membership_cv:
+            if self.watchers >= self.max_watchers:
+                context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "Too many membership watchers; poll GetMembership")
+            self.watchers += 1
+        # A client that goes away wakes its stream at once instead of at the next change.
+        def wake():
+            with self.membership_cv:
+                self.membership_cv.notify_all()
+        context.add_callback(wake)
+        try:
+            known = request.known_version
+            # Streams end after watch_timeout so threads of clients that vanished without closing
+            # the connection are reclaimed; clients reopen with the version they have.
+            deadline = time.time() + self.watch_timeout
+            while True:
+                with self.membership_cv:
+                    self.membership_cv.wait_for(
+                        lambda: (self.membership_version != known or not context.is_active()
+                                 or self.stop_event.is_set()),
+                        timeout=max(0.0, deadline - time.time()))
+                    if self.membership_version == known or not context.is_active() or self.stop_event.is_set():
+                        return
+                    known = self.membership_version
+                    update = self.membership_update(known)
+                yield update
+        finally:
+            with self.membership_cv:
+                self.watchers -= 1
+
+    def get_stub(self, addr):
+        # Channels are reused per peer so compression and HTTP/2 state are negotiated once.
+        with self.stubs_lock:
+            stub = self.stubs.get(addr)
+            if stub is None:
+                channel = grpc.insecure_channel(addr, options=grpc_options(self.config),
+                                                compression=grpc_compression(self.config))
+                self.channels.append(channel)
+                if self.channel_interceptor_factory is not None:
+                    channel = grpc.intercept_channel(channel, self.channel_interceptor_factory(self.my_address, addr))
+                stub = chat_pb2_grpc.ChatServiceStub(channel)
+                self.stubs[addr] = stub
+            return stub
+
+    def payload_encoding_for(self, addr, size):
+        if size < self.payload_compression_threshold:
+            return payload_codec.IDENTITY
+        accepted = self.peer_encodings.get(addr)
+        if not accepted:
+            # Peer has not advertised its codecs yet; plain JSON is always understood.
+            return payload_codec.IDENTITY
+        return payload_codec.negotiate(self.payload_compression, accepted)
+
+    def build_replication_request(self, batch, encoding, index=0, prev_index=0):
+        if encoding == payload_codec.IDENTITY:
+            return chat_pb2.ReplicationRequest(batch=batch, index=index, prev_index=prev_index,
+                                               leader_address=self.my_address)
+        return chat_pb2.ReplicationRequest(encoding=encoding, index=index, prev_index=prev_index,
+                                           leader_address=self.my_address,
+                                           payload=payload_codec.compress(batch.SerializeToString(), encoding))
+
+    def replicate_to_followers(self, index, *operations):
+        # Voters only; learners are fed by their own replication threads.
+        batch = chat_pb2.OperationBatch(operations=operations)
+        hashes = {op.send_message.content_hash for op in operations
+                  if op.WhichOneof("op") == "send_message" and op.send_message.content_hash}
+        requests = {}
         for addr in self.replica_addresses:
             if addr == self.my_address:
                 continue
+            known = self.peer_blobs[addr]
             try:
-                channel = grpc.insecure_channel(addr)
-                stub = chat_pb2_grpc.ChatServiceStub(channel)
-                stub.ReplicateOperation(req, timeout=2)
+                stub = self.get_stub(addr)
+                # Blob bodies the follower already stores are left out; if it reports some as
+                # missing, the batch is sent once more with those bodies included.
+                with self.peer_blobs_lock:
+                    skip = frozenset(h for h in hashes if h in known)
+                for attempt in range(2):
+                    peer_batch = self.without_blob_bodies(batch, skip)
+                    encoding = self.payload_encoding_for(addr, peer_batch.ByteSize())
+                    if (encoding, skip) not in requests:
+                        requests[(encoding, skip)] = self.build_replication_request(peer_batch, encoding,
+                                                                                    index, index - 1)
+                    with tracing.span(f"replicate {addr}"):
+                        resp = stub.ReplicateOperation(requests[(encoding, skip)], timeout=self.peer_rpc_timeout,
+                                                       metadata=tracing.outgoing_metadata())
+                    if not resp.missing_blobs:
+                        break
+                    self.metrics.inc("replication_missing_blobs", {"peer": addr}, len(resp.missing_blobs))
+                    with self.peer_blobs_lock:
+                        for h in resp.missing_blobs:
+                            known.pop(h, None)
+                    skip = skip - set(resp.missing_blobs)
+                if resp.success:
+                    self.remember_peer_blobs(addr, hashes)
+                    self.metrics.inc("replication_blob_bytes_skipped", {"peer": addr},
+                                     batch.ByteSize() - peer_batch.ByteSize())
+                elif resp.applied_index < index - 1:
+                    self.catch_up_follower(addr, stub, resp.applied_index)
             except Exception as e:
                 logging.error(f"Replication to {addr} failed: {e}")
 
+    def catch_up_follower(self, addr, stub, applied_index):
+        # A voter missed batches (e.g. a replication call timed out); the log entries after its
+        # index are resent one by one, so its own log keeps one entry per index should it lead later.
+        entries = self.log_entries_after(applied_index)
+        if not entries:
+            if entries is None:
+                logging.error(f"Follower {addr} is behind the replication log at index {applied_index}.")
+            return
+        self.metrics.inc("replication_catchups", {"peer": addr})
+        for index, batch in entries:
+            req = self.build_replication_request(batch, self.payload_encoding_for(addr, batch.ByteSize()),
+                                                 index, index - 1)
+            resp = stub.ReplicateOperation(req, timeout=self.peer_rpc_timeout)
+            if not resp.success:
+                logging.error(f"Catch-up of {addr} failed at index {index}: {resp.message}")
+                return
+
+    def without_blob_bodies(self, batch, hashes):
+        # Copy of `batch` with the bodies of the given blobs removed (hash kept). Within the
+        # batch only the first op of each other blob carries its body.
+        if not any(op.WhichOneof("op") == "send_message" and op.send_message.content_hash for op in batch.operations):
+            return batch
+        stripped = chat_pb2.OperationBatch()
+        stripped.CopyFrom(batch)
+        carried = set(hashes)
+        for op in stripped.operations:
+            if op.WhichOneof("op") == "send_message" and op.send_message.content_hash:
+                if op.send_message.content_hash in carried:
+                    op.send_message.content = ""
+                carried.add(op.send_message.content_hash)
+        return stripped
+
+    def remember_peer_blobs(self, addr, hashes):
+        with self.peer_blobs_lock:
+            known = self.peer_blobs[addr]
+            for h in hashes:
+                known[h] = True
+                known.move_to_end(h)
+            while len(known) > self.peer_blobs_size:
+                known.popitem(last=False)
+
+    def start_learner_replication(self, addr, next_index):
+        with self.write_lock:
+            if addr in self.learner_replicators:
+                return
+            self.learner_replicators.add(addr)
+        threading.Thread(target=self.learner_replication_loop, args=(addr, next_index), daemon=True).start()
+
+    def learner_replication_loop(self, addr, next_index):
+        # Streams the replication log to one learner off the write path. Consecutive entries are
+        # merged into one batch, so a lagging learner catches up in few round trips.
+        try:
+            while self.is_leader and addr in self.learner_addresses and not self.stop_event.is_set():
+                with self.replication_cv:
+                    self.replication_cv.wait_for(lambda: self.applied_index >= next_index or not self.is_leader,
+                                                 timeout=self.heartbeat_interval)
+                    if self.applied_index < next_index:
+                        continue
+                    entries = self.log_entries_after(next_index - 1)
+                    if entries is None:
+                        # The learner fell behind the in-memory log; dropping it stops its heartbeats
+                        # and it rejoins with a fresh snapshot.
+                        logging.error(f"Learner {addr} is behind the replication log; removing it.")
+                        self.learner_addresses.remove(addr)
+                        self.membership_changed()
+                        return
+                    entries = entries[:self.learner_batch_size]
+                    self.metrics.set("learner_lag", self.applied_index - next_index + 1, {"learner": addr})
+                batch = chat_pb2.OperationBatch(operations=[op for _, b in entries for op in b.operations])
+                index = entries[-1][0]
+                req = self.build_replication_request(batch, self.payload_encoding_for(addr, batch.ByteSize()),
+                                                     index, next_index - 1)
+                try:
+                    resp = self.get_stub(addr).ReplicateOperation(req, timeout=5)
+                except Exception as e:
+                    logging.error(f"Replication to learner {addr} failed: {e}")
+                    self.stop_event.wait(self.heartbeat_interval)
+                    continue
+                if resp.success:
+                    next_index = index + 1
+                else:
+                    self.metrics.inc("learner_resends", {"learner": addr})
+                    logging.warning(f"Learner {addr} rejected batch up to {index} ({resp.message}); "
+                                    f"resending from {resp.applied_index + 1}")
+                    next_index = resp.applied_index + 1
+        finally:
+            with self.write_lock:
+                self.learner_replicators.discard(addr)
+
     # Client-facing RPCs (only leader processes writes)
     def CreateAccount(self, request, context):
         if not self.is_leader:
@@ -290,41 +1173,15 @@ class ReplicatedChatService(chat_pb2_grpc.ChatServiceServicer):
         password = request.password
         if not username or not password:
             return chat_pb2.CreateAccountResponse(success=False, message="Username or password missing")
+        op = chat_pb2.Operation(create_account=chat_pb2.CreateAccountOp(username=username, password=password))
         try:
-            self.cursor.execute("INSERT INTO accounts (username, password) VALUES (?,?)", (username, password))
-            self.conn.commit()
+            index = self.apply_batch(chat_pb2.OperationBatch(operations=[op]))
         except sqlite3.IntegrityError:
             return chat_pb2.CreateAccountResponse(success=False, message="Username already taken")
-        self.replicate_to_followers("create_account", {"username": username, "password": password})
+        self.replicate_to_followers(index, op)
         logging.info(f"Account created: {username}")
         return chat_pb2.CreateAccountResponse(success=True, message=f"Account '{username}' created successfully")
 
-    def Login(self, request, context):
-        username = request.username
-        password = request.password
-        if not username or not password:
-            return chat_pb2.LoginResponse(success=False, message="Username or password missing", unread_count=0)
-        self.cursor.execute("SELECT password FROM accounts WHERE username=?", (username,))
-        row = self.cursor.fetchone()
-        if row is None:
-            return chat_pb2.LoginResponse(success=False, message="No such user", unread_count=0)
-        if row[0] != password:
-            return chat_pb2.LoginResponse(success=False, message="Incorrect password", unread_count=0)
-        self.cursor.execute("SELECT COUNT(*) FROM messages WHERE recipient=? AND read=0", (username,))
-        unread_count = self.cursor.fetchone()[0]
-        logging.info(f"User logged in: {username}")
-        return chat_pb2.LoginResponse(success=True, message=f"User '{username}' logged in successfully", unread_count=unread_count)
-
-    def ListAccounts(self, request, context):
-        pattern = request.pattern
-        if pattern:
-            self.cursor.execute("SELECT username FROM accounts WHERE username LIKE ?", ('%'+pattern+'%',))
-        else:
-            self.cursor.execute("SELECT username FROM accounts")
-        accounts = [row[0] for row in self.cursor.fetchall()]
-        logging.info(f"Listing accounts with pattern: '{pattern}'")
-        return chat_pb2.ListAccountsResponse(success=True, accounts=accounts)
-
     def SendMessage(self, request, context):
         if not self.is_leader:
             return chat_pb2.SendMessageResponse(success=False, message="Not leader. Please contact the leader.")
@@ -333,39 +1190,44 @@ class ReplicatedChatService(chat_pb2_grpc.ChatServiceServicer):
         content = request.content
         if not sender or not recipient or content is None:
             return chat_pb2.SendMessageResponse(success=False, message="Missing fields")
-        timestamp_str = datetime.datetime.now().strftime('%m/%d %H:%M')
+        now = datetime.datetime.now()
+        timestamp_str = now.strftime('%m/%d %H:%M')
 
 
         # Ensure the recipient account actually exists:
         self.cursor.execute("SELECT 1 FROM accounts WHERE username=?", (recipient,))
         if not self.cursor.fetchone():
             return chat_pb2.SendMessageResponse(success=False, message=f"Recipient '{recipient}' does not exist.")
+        op = chat_pb2.SendMessageOp(sender=sender, recipient=recipient, content=content, timestamp=timestamp_str,
+                                    created_at=int(now.timestamp() * 1000))
+        if self.blob_threshold and len(content.encode()) >= self.blob_threshold:
+            op.content_hash = hashlib.sha256(content.encode()).hexdigest()
+        batch = chat_pb2.OperationBatch(operations=[chat_pb2.Operation(send_message=op)])
         try:
-            self.cursor.execute("INSERT INTO messages (sender, recipient, content, read, timestamp) VALUES (?,?,?,?,?)",
-                                (sender, recipient, content, 0, timestamp_str))
-            self.conn.commit()
+            index = self.apply_batch(batch)
         except Exception as e:
             return chat_pb2.SendMessageResponse(success=False, message=str(e))
-        self.replicate_to_followers("send_message", {
-            "sender": sender,
-            "recipient": recipient,
-            "content": content,
-            "timestamp": timestamp_str
-        })
+        self.replicate_to_followers(index, *batch.operations)
         logging.info(f"Message from '{sender}' to '{recipient}' sent")
         return chat_pb2.SendMessageResponse(success=True, message="Message sent successfully")
 
     def ReadNewMessages(self, request, context):
+        # Marking messages read is a replicated write, so followers must not apply it locally.
+        if not self.is_leader:
+            return chat_pb2.ReadNewMessagesResponse(success=False, messages=[])
         username = request.username
         count = request.count
         if not username:
             return chat_pb2.ReadNewMessagesResponse(success=False, messages=[])
-        self.cursor.execute("SELECT id, sender, content, timestamp FROM messages WHERE recipient=? AND read=0", (username,))
+        self.cursor.execute(f"SELECT m.id, m.sender, {MESSAGE_BODY}, m.timestamp FROM messages m {BLOB_JOIN} "
+                            "WHERE m.recipient=? AND m.read=0", (username,))
         rows = self.cursor.fetchall()
         unread = rows if count <= 0 or count > len(rows) else rows[:count]
-        for row in unread:
-            self.cursor.execute("UPDATE messages SET read=1 WHERE id=?", (row[0],))
-        self.conn.commit()
+        if unread:
+            op = chat_pb2.Operation(mark_read=chat_pb2.MarkReadOp(username=username, message_ids=[r[0] for r in unread]))
+            batch = chat_pb2.OperationBatch(operations=[op])
+            index = self.apply_batch(batch)
+            self.replicate_to_followers(index, *batch.operations)
         messages = [f"{r[3]} - From: {r[1]} - {r[2]}" for r in unread]
         logging.info(f"Read {len(messages)} new messages for user '{username}'")
         return chat_pb2.ReadNewMessagesResponse(success=True, messages=messages)
@@ -377,16 +1239,14 @@ class ReplicatedChatService(chat_pb2_grpc.ChatServiceServicer):
         msg_ids = request.message_ids
         if not username or not msg_ids:
             return chat_pb2.DeleteMessagesResponse(success=False, message="Missing fields")
+        op = chat_pb2.Operation(delete_messages=chat_pb2.DeleteMessagesOp(username=username, message_ids=msg_ids))
+        # The batch holds a copy of op, which apply_batch fills with the assigned change seqs.
+        batch = chat_pb2.OperationBatch(operations=[op])
         try:
-            if len(msg_ids) == 1 and msg_ids[0] == -1:
-                self.cursor.execute("DELETE FROM messages WHERE recipient=?", (username,))
-            else:
-                for i in msg_ids:
-                    self.cursor.execute("DELETE FROM messages WHERE id=? AND recipient=?", (i, username))
-            self.conn.commit()
+            index = self.apply_batch(batch)
         except Exception as e:
             return chat_pb2.DeleteMessagesResponse(success=False, message=str(e))
-        self.replicate_to_followers("delete_messages", {"username": username, "message_ids": list(msg_ids)})
+        self.replicate_to_followers(index, *batch.operations)
         logging.info(f"Deleted messages for user '{username}'")
         return chat_pb2.DeleteMessagesResponse(success=True, message="Messages deleted successfully")
 
@@ -396,41 +1256,160 @@ class ReplicatedChatService(chat_pb2_grpc.ChatServiceServicer):
         username = request.username
         if not username:
             return chat_pb2.DeleteAccountResponse(success=False, message="Username missing")
+        op = chat_pb2.Operation(delete_account=chat_pb2.DeleteAccountOp(username=username))
         try:
-            self.cursor.execute("DELETE FROM accounts WHERE username=?", (username,))
-            self.cursor.execute("DELETE FROM messages WHERE recipient=?", (username,))
-            self.conn.commit()
+            index = self.apply_batch(chat_pb2.OperationBatch(operations=[op]))
         except Exception as e:
             return chat_pb2.DeleteAccountResponse(success=False, message=str(e))
-        self.replicate_to_followers("delete_account", {"username": username})
+        self.replicate_to_followers(index, op)
         logging.info(f"Account deleted: {username}")
         return chat_pb2.DeleteAccountResponse(success=True, message=f"Account '{username}' deleted successfully")
 
-    def ListMessages(self, request, context):
-        username = request.username
-        if not username:
-            return chat_pb2.ListMessagesResponse(success=False, messages=[])
-        self.cursor.execute("SELECT sender, content, timestamp FROM messages WHERE recipient=? AND read=1", (username,))
-        rows = self.cursor.fetchall()
-        messages = [f"{r[2]} - From: {r[0]} - {r[1]}" for r in rows]
-        logging.info(f"Listing all read messages for user '{username}'")
-        return chat_pb2.ListMessagesResponse(success=True, messages=messages)
+class ReadWorkerService(ChatReadHandlers, AdminHandlers, chat_pb2_grpc.ChatServiceServicer):
+    """Extra worker process of a node: serves reads from the WAL database and forwards the rest."""
+
+    def __init__(self, config):
+        self.config = config
+        self.db_file = config.get("db_file", f"chat_{config.get('server_id', 1)}.db")
+        self.list_compression_threshold = config.get("list_compression_threshold", 64 * 1024)
+        self.forward_timeout = config.get("forward_timeout", 5)
+        self.metrics = metrics.MetricsRegistry()
+        self.profiler = profiler.StackSampler(config.get("profiler_dir", "."),
+                                              f"profile_{config.get('server_id', 1)}_worker{os.getpid()}")
+        self.local = threading.local()
+        channel = grpc.insecure_channel(primary_address(config), options=grpc_options(config))
+        self.primary_stub = chat_pb2_grpc.ChatServiceStub(channel)
+
+    def read_cursor(self):
+        # One read-only connection per gRPC thread so reads run in parallel under WAL.
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = connect_db(self.config, f"file:{self.db_file}?mode=ro", uri=True)
+            self.local.conn = conn
+        return conn.cursor()
+
+    def WatchMembership(self, request, context):
+        # Membership lives in the primary process; its stream is relayed unchanged and counts
+        # against the primary's watcher limit.
+        call = self.primary_stub.WatchMembership(request)
+        context.add_callback(call.cancel)
+        try:
+            for update in call:
+                yield update
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.CANCELLED:
+                context.abort(e.code(), e.details())
+
+def _forward_to_primary(name):
+    def method(self, request, context):
+        try:
+            with tracing.span("forward"):
+                return getattr(self.primary_stub, name)(request, timeout=self.forward_timeout,
+                                                        metadata=tracing.outgoing_metadata())
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
+    method.__name__ = name
+    return method
+
+for _name in FORWARDED_METHODS:
+    setattr(ReadWorkerService, _name, _forward_to_primary(_name))
+
+def build_grpc_server(config, metrics_registry):
+    executor = admission.AdmissionExecutor(max_workers=config.get("max_workers", 10))
+    interceptors = []
+    # Tracing runs first so queue wait and admission rejections are included in the trace.
+    tracing_config = config.get("tracing", {})
+    if tracing_config.get("enabled", False):
+        interceptors.append(tracing.TracingInterceptor(tracing_config, metrics_registry))
+    admission_config = config.get("admission", {})
+    if admission_config.get("enabled", False):
+        interceptors.append(admission.AdmissionInterceptor(admission_config, executor, metrics_registry))
+    options = grpc_options(config)
+    # Clients may ping this often on idle connections without being sent GOAWAY.
+    options.append(("grpc.http2.min_recv_ping_interval_without_data_ms",
+                    config.get("keepalive", {}).get("min_client_ping_interval_ms", DEFAULT_MIN_CLIENT_PING_INTERVAL_MS)))
+    # Only multi-process nodes share their port; otherwise a second server on the port must fail.
+    options.append(("grpc.so_reuseport", 1 if config.get("workers", 1) > 1 else 0))
+    return grpc.server(executor,
+                       interceptors=interceptors,
+                       options=options,
+                       compression=grpc_compression(config))
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    chat_service = ReplicatedChatService(config)
-    chat_pb2_grpc.add_ChatServiceServicer_to_server(chat_service, server)
+def exit_with_parent(parent_conn):
+    import multiprocessing.connection
+    # Daemon children are only reaped when the primary exits cleanly; if it is killed, the
+    # workers must not keep serving (and holding the shared port) on their own. The primary
+    # holds the other end of `parent_conn` and never writes to it, so the pipe only becomes
+    # readable (at EOF) once the primary is gone.
+    def watch():
+        multiprocessing.connection.wait([parent_conn])
+        os._exit(0)
+    threading.Thread(target=watch, daemon=True).start()
+
+def run_read_worker(config, worker_index, parent_conn):
+    logging.basicConfig(level=logging.INFO)
+    exit_with_parent(parent_conn)
+    service = ReadWorkerService(config)
+    install_profiler_signal(service.profiler)
+    server = build_grpc_server(config, service.metrics)
+    chat_pb2_grpc.add_ChatServiceServicer_to_server(service, server)
+    add_health_service(server)
     bind_address = f"{config.get('server_host', 'localhost')}:{config.get('server_port', 50051)}"
     server.add_insecure_port(bind_address)
     server.start()
+    print(f"Read worker {worker_index} started on {bind_address} | server_id: {config.get('server_id', 1)}")
+    server.wait_for_termination()
+
+def create_server(config, channel_interceptor_factory=None):
+    """Builds one node from an explicit config dict; returns (server, service).
+
+    Nothing is read from argv, the environment or config files, so several nodes can run in
+    one process. Start the node with start_server() and stop it with stop_server().
+    """
+    service = ReplicatedChatService(config, channel_interceptor_factory=channel_interceptor_factory)
+    server = build_grpc_server(config, service.metrics)
+    chat_pb2_grpc.add_ChatServiceServicer_to_server(service, server)
+    service.health_servicer = add_health_service(server)
+    bind_address = f"{config.get('server_host', 'localhost')}:{config.get('server_port', 50051)}"
+    server.add_insecure_port(bind_address)
+    if config.get("workers", 1) > 1:
+        server.add_insecure_port(primary_address(config))
+    return server, service
+
+def start_server(server, service):
+    server.start()
+    service.start()
+
+def stop_server(server, service, grace=None):
+    # Health checks report NOT_SERVING first so clients move on before the port closes.
+    if service.health_servicer is not None:
+        service.health_servicer.enter_graceful_shutdown()
+    server.stop(grace).wait()
+    service.stop()
+
+def serve(config):
+    server, chat_service = create_server(config)
+    install_profiler_signal(chat_service.profiler)
+    start_server(server, chat_service)
+    bind_address = f"{config.get('server_host', 'localhost')}:{config.get('server_port', 50051)}"
     print(f"Server started on {bind_address} | server_id: {chat_service.server_id} | Leader: {chat_service.is_leader}")
+    # Spawned (not forked) so no gRPC state is shared with the child processes.
+    import multiprocessing
+    context = multiprocessing.get_context("spawn")
+    # Write ends of the pipes the workers watch; they close when this process dies.
+    worker_pipes = []
+    for worker_index in range(1, config.get("workers", 1)):
+        reader, writer = context.Pipe(duplex=False)
+        context.Process(target=run_read_worker, args=(config, worker_index, reader), daemon=True).start()
+        reader.close()
+        worker_pipes.append(writer)
     try:
         while True:
             time.sleep(86400)
     except KeyboardInterrupt:
         print("Shutting down server")
-        server.stop(0)
+        stop_server(server, chat_service, grace=0)
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
-    serve()
+    serve(load_config())
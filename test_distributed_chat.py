@@ -1,9 +1,35 @@
+import datetime
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock, call
 import grpc
 
 import chat_pb2
 import chat_pb2_grpc
+import admission
+from chat_client import ChatClient
+import db_schema
+import list_db
+import metrics
+from message_cache import MessageCache
+import payload_codec
+import profiler
+import replicated_server
+from cluster_harness import LocalCluster, free_port
+import tracing
+
+try:
+    from grpc_health.v1 import health_pb2, health_pb2_grpc
+except ImportError:
+    health_pb2 = None
 
 
 class TestDistributedChatSystem(unittest.TestCase):
@@ -86,5 +112,778 @@ class TestDistributedChatSystem(unittest.TestCase):
         self.assertTrue(response.success, "ReadNewMessages should succeed")
         self.assertGreaterEqual(len(response.messages), 1, "Should receive at least 1 message")
 
+
+class TestReplicationEncoding(unittest.TestCase):
+
+    def test_operation_batch_round_trip(self):
+        """Typed operations survive serialization, optionally compressed, in order."""
+        batch = chat_pb2.OperationBatch(operations=[
+            chat_pb2.Operation(create_account=chat_pb2.CreateAccountOp(username="a", password="p")),
+            chat_pb2.Operation(send_message=chat_pb2.SendMessageOp(id=7, sender="a", recipient="b", content="hi")),
+            chat_pb2.Operation(mark_read=chat_pb2.MarkReadOp(username="b", message_ids=[7])),
+        ])
+        request = chat_pb2.ReplicationRequest(
+            encoding="zlib", payload=payload_codec.compress(batch.SerializeToString(), "zlib"))
+        decoded = chat_pb2.OperationBatch.FromString(
+            payload_codec.decompress(request.payload, request.encoding))
+        self.assertEqual([op.WhichOneof("op") for op in decoded.operations],
+                         ["create_account", "send_message", "mark_read"])
+        self.assertEqual(decoded.operations[1].send_message.id, 7)
+
+class TestAdmissionControl(unittest.TestCase):
+
+    class Aborted(Exception):
+        pass
+
+    def setUp(self):
+        self.now = 0.0
+        self.executor = MagicMock(pending=0)
+        self.metrics = metrics.MetricsRegistry()
+        self.context = MagicMock()
+        self.context.abort.side_effect = self.Aborted
+        self.interceptor = admission.AdmissionInterceptor({
+            "max_inflight": 8,
+            "read_shed_ratio": 0.5,
+            "user_rate": 1,
+            "user_burst": 2,
+            "method_limits": {"SendMessage": {"rate": 1, "burst": 3}},
+        }, self.executor, self.metrics, clock=lambda: self.now)
+
+    def call(self, method, request):
+        handler = self.interceptor.intercept_service(
+            lambda details: grpc.unary_unary_rpc_method_handler(lambda req, ctx: "ok"),
+            MagicMock(method=f"/chat.ChatService/{method}"))
+        return handler.unary_unary(request, self.context)
+
+    def test_token_bucket_refills_over_time(self):
+        """A bucket allows its burst, then refills at the configured rate."""
+        bucket = admission.TokenBucket(rate=2, burst=2, clock=lambda: self.now)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        self.now += 0.5
+        self.assertTrue(bucket.try_acquire())
+
+    def test_per_user_rate_limit(self):
+        """A user looping requests is rejected without affecting other users."""
+        request = chat_pb2.ListMessagesRequest(username="alice")
+        self.assertEqual(self.call("ListMessages", request), "ok")
+        self.assertEqual(self.call("ListMessages", request), "ok")
+        with self.assertRaises(self.Aborted):
+            self.call("ListMessages", request)
+        self.context.abort.assert_called_with(grpc.StatusCode.RESOURCE_EXHAUSTED, unittest.mock.ANY)
+        self.assertEqual(self.call("ListMessages", chat_pb2.ListMessagesRequest(username="bob")), "ok")
+        self.assertEqual(self.metrics.get("admission_rejected_total",
+                                          {"method": "ListMessages", "reason": "user_rate"}), 1)
+
+    def test_reads_are_shed_before_writes(self):
+        """Above the read-shed threshold reads fail fast while writes are still admitted."""
+        self.executor.pending = 4
+        with self.assertRaises(self.Aborted):
+            self.call("ListAccounts", chat_pb2.ListAccountsRequest(username="alice"))
+        self.assertEqual(self.call("SendMessage", chat_pb2.SendMessageRequest(sender="alice", to="bob")), "ok")
+        self.executor.pending = 8
+        with self.assertRaises(self.Aborted):
+            self.call("SendMessage", chat_pb2.SendMessageRequest(sender="bob", to="alice"))
+        self.assertEqual(self.call("Heartbeat", chat_pb2.HeartbeatRequest()), "ok")
+
+    def test_membership_checks_are_never_shed(self):
+        """Clients' periodic GetMembership calls are answered even when the server sheds other work."""
+        self.executor.pending = 8
+        with self.assertRaises(self.Aborted):
+            self.call("ListAccounts", chat_pb2.ListAccountsRequest(username="alice"))
+        for _ in range(5):
+            self.assertEqual(self.call("GetMembership", chat_pb2.GetMembershipRequest(known_version=1)), "ok")
+
+    def test_conversation_reads_count_against_the_user(self):
+        """GetConversation names its caller in `user` and is limited like the other per-user reads."""
+        request = chat_pb2.GetConversationRequest(user="alice", peer="bob")
+        self.assertEqual(self.call("GetConversation", request), "ok")
+        self.assertEqual(self.call("GetConversation", request), "ok")
+        with self.assertRaises(self.Aborted):
+            self.call("GetConversation", request)
+        self.assertEqual(self.metrics.get("admission_rejected_total",
+                                          {"method": "GetConversation", "reason": "user_rate"}), 1)
+
+    def test_open_watch_streams_do_not_shed_reads(self):
+        """Threads held by membership watch streams are not counted as queued requests."""
+        def watch(request, context):
+            self.executor.pending += 1
+            yield chat_pb2.MembershipUpdate(version=1)
+            yield chat_pb2.MembershipUpdate(version=2)
+        handler = self.interceptor.intercept_service(
+            lambda details: grpc.unary_stream_rpc_method_handler(watch),
+            MagicMock(method="/chat.ChatService/WatchMembership"))
+        self.executor.pending = 3
+        stream = handler.unary_stream(chat_pb2.GetMembershipRequest(), self.context)
+        self.assertEqual(next(stream).version, 1)
+        self.assertEqual(self.call("ListAccounts", chat_pb2.ListAccountsRequest(username="alice")), "ok")
+        self.assertEqual(list(stream)[0].version, 2)
+        self.assertEqual(self.interceptor.open_streams, 0)
+
+class TestMembership(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=2, spare=1).start()
+        self.addCleanup(self.cluster.close)
+
+    def membership(self, known_version):
+        return self.cluster.client_stub(1).GetMembership(chat_pb2.GetMembershipRequest(known_version=known_version),
+                                                         timeout=2)
+
+    def test_lists_sent_only_when_version_changes(self):
+        """An up-to-date client gets only the version back; a join bumps it and the lists are sent again."""
+        current = self.membership(0)
+        self.assertEqual(current.leader_address, self.cluster.addresses[0])
+        self.assertEqual(sorted(current.replica_addresses), sorted(self.cluster.addresses[:2]))
+        self.assertEqual(self.membership(current.version), chat_pb2.MembershipUpdate(version=current.version))
+
+        self.cluster.join_node(3, role="learner")
+        update = self.membership(current.version)
+        self.assertGreater(update.version, current.version)
+        self.assertEqual(list(update.learner_addresses), [self.cluster.addresses[2]])
+
+    def wait_for_watchers(self, count, timeout=5):
+        deadline = time.time() + timeout
+        while self.cluster.service(1).watchers != count and time.time() < deadline:
+            time.sleep(0.01)
+        return self.cluster.service(1).watchers
+
+    def test_watch_pushes_changes(self):
+        """A watch gets the lists at once, then again only when a join changes them."""
+        stream = self.cluster.client_stub(1).WatchMembership(chat_pb2.GetMembershipRequest(known_version=0),
+                                                             timeout=10)
+        first = next(stream)
+        self.assertEqual(first.leader_address, self.cluster.addresses[0])
+        self.assertEqual(self.wait_for_watchers(1), 1)
+        self.cluster.join_node(3, role="learner")
+        update = next(stream)
+        self.assertGreater(update.version, first.version)
+        self.assertEqual(list(update.learner_addresses), [self.cluster.addresses[2]])
+        # A cancelled watch frees its server thread without waiting for the next change.
+        stream.cancel()
+        self.assertEqual(self.wait_for_watchers(0), 0)
+
+    def test_watchers_over_the_limit_poll(self):
+        """Past max_watchers the server refuses the watch and the client polls GetMembership instead."""
+        self.cluster.service(1).max_watchers = 1
+        stub = self.cluster.client_stub(1)
+        held = stub.WatchMembership(chat_pb2.GetMembershipRequest(known_version=0), timeout=10)
+        next(held)
+        self.addCleanup(held.cancel)
+        with self.assertRaises(grpc.RpcError) as refused:
+            next(stub.WatchMembership(chat_pb2.GetMembershipRequest(known_version=0), timeout=10))
+        self.assertEqual(refused.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+        host, port = self.cluster.addresses[0].split(":")
+        client = ChatClient({"client_connect_host": host, "client_connect_port": int(port), "rpc_timeout": 1,
+                             "replica_addresses": self.cluster.addresses[:2]})
+        self.addCleanup(client.close)
+        client.running = True
+        self.assertFalse(client.watch_membership())
+        self.assertGreater(client.watch_retry_at, time.time())
+        client.refresh_membership()
+        self.assertEqual(client.membership_version, self.cluster.service(1).membership_version)
+
+    def test_client_follows_leader_change(self):
+        """The client's periodic check notices a dead leader and moves to the new one."""
+        host, port = self.cluster.addresses[0].split(":")
+        client = ChatClient({"client_connect_host": host, "client_connect_port": int(port), "rpc_timeout": 1,
+                             "retry_delay": 0, "replica_addresses": self.cluster.addresses[:2]})
+        self.addCleanup(client.close)
+        client.refresh_membership()
+        self.assertGreater(client.membership_version, 0)
+        self.cluster.stop_node(1)
+        self.cluster.wait_for_leader()
+        client.refresh_membership()
+        self.assertEqual(client.leader_address, self.cluster.addresses[1])
+        client.refresh_membership()
+        self.assertEqual(client.membership_version, self.cluster.service(2).membership_version)
+
+    def test_client_watch_follows_leader_change(self):
+        """A running client's watch breaks when the leader stops, and the client watches the new leader."""
+        host, port = self.cluster.addresses[0].split(":")
+        client = ChatClient({"client_connect_host": host, "client_connect_port": int(port), "rpc_timeout": 1,
+                             "retry_delay": 0, "replica_addresses": self.cluster.addresses[:2]})
+        self.addCleanup(client.close)
+        client.start()
+        self.assertEqual(self.wait_for_watchers(1), 1)
+        self.cluster.stop_node(1)
+        self.cluster.wait_for_leader()
+        deadline = time.time() + 10
+        while (client.leader_address != self.cluster.addresses[1] or self.cluster.service(2).watchers != 1) \
+                and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(client.leader_address, self.cluster.addresses[1])
+        self.assertEqual(self.cluster.service(2).watchers, 1)
+
+    @unittest.skipIf(health_pb2 is None, "grpcio-health-checking is not installed")
+    def test_health_service_reports_shutdown(self):
+        """Nodes serve grpc.health.v1 and report NOT_SERVING once shutdown starts."""
+        channel = grpc.insecure_channel(self.cluster.addresses[0])
+        self.addCleanup(channel.close)
+        health = health_pb2_grpc.HealthStub(channel)
+        for service_name in ("", replicated_server.HEALTH_SERVICE_NAME):
+            self.assertEqual(health.Check(health_pb2.HealthCheckRequest(service=service_name), timeout=2).status,
+                             health_pb2.HealthCheckResponse.SERVING)
+        self.cluster.service(1).health_servicer.enter_graceful_shutdown()
+        self.assertEqual(health.Check(health_pb2.HealthCheckRequest(), timeout=2).status,
+                         health_pb2.HealthCheckResponse.NOT_SERVING)
+
+class TestMessageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = MessageCache("testuser_2", self.tmp.name, batch_size=2)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_sync_pages_and_applies_tombstones(self):
+        """Sync follows has_more pages, then later deltas delete and update cached rows."""
+        msg = lambda i, read=True: chat_pb2.SyncedMessage(id=i, sender="testuser_1", content=f"m{i}",
+                                                           timestamp="03/14 12:30", read=read)
+        responses = [
+            chat_pb2.SyncMessagesResponse(success=True, messages=[msg(1), msg(2)], last_id=2, has_more=True),
+            chat_pb2.SyncMessagesResponse(success=True, messages=[msg(3, read=False)], last_id=3),
+            chat_pb2.SyncMessagesResponse(success=True, messages=[msg(3)], deleted_ids=[1], last_id=5),
+        ]
+        requests = []
+        call = lambda request: (requests.append(request.since_id), responses.pop(0))[1]
+        self.assertTrue(self.cache.sync(call))
+        self.assertEqual(requests, [0, 2])
+        self.assertEqual([i for i, _ in self.cache.read_messages()], [1, 2])
+        self.assertTrue(self.cache.sync(call))
+        self.assertEqual(requests, [0, 2, 3])
+        self.assertEqual(self.cache.read_messages(), [(2, "03/14 12:30 - From: testuser_1 - m2"),
+                                                      (3, "03/14 12:30 - From: testuser_1 - m3")])
+
+    def test_cursor_survives_restart_and_reset_clears(self):
+        """The sync cursor persists across instances; a reset response drops stale rows."""
+        self.cache.apply(chat_pb2.SyncMessagesResponse(success=True, last_id=9, messages=[
+            chat_pb2.SyncedMessage(id=4, sender="a", content="old", read=True)]))
+        reopened = MessageCache("testuser_2", self.tmp.name)
+        self.assertEqual(reopened.last_id, 9)
+        reopened.apply(chat_pb2.SyncMessagesResponse(success=True, reset=True, last_id=1, messages=[
+            chat_pb2.SyncedMessage(id=1, sender="a", content="new", read=True)]))
+        self.assertEqual([i for i, _ in reopened.read_messages()], [1])
+        reopened.close()
+
+    def test_preview_body_fetched_once(self):
+        """A truncated preview is replaced by the full body on first access."""
+        self.cache.apply(chat_pb2.SyncMessagesResponse(success=True, last_id=2, messages=[
+            chat_pb2.SyncedMessage(id=i, sender="a", content="long", read=True, content_hash="h", truncated=True)
+            for i in (1, 2)]))
+        self.assertTrue(self.cache.read_messages()[0][1].endswith("long..."))
+        requests = []
+        fetch = lambda request: (requests.append(request.hash),
+                                 chat_pb2.GetBlobResponse(success=True, content="long body"))[1]
+        self.assertEqual(self.cache.body(1, fetch), "long body")
+        self.assertEqual(self.cache.body(2, fetch), "long body")
+        self.assertEqual(requests, ["h"])
+
+class TestChangeLogReplication(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=2, spare=1).start()
+        self.addCleanup(self.cluster.close)
+        self.stub = self.cluster.client_stub(1)
+        for username in ("alice", "bob", "carol"):
+            self.stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"), timeout=2)
+
+    def query(self, index, sql):
+        conn = sqlite3.connect(self.cluster.node_config(index)["db_file"])
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def send(self, to, content):
+        self.assertTrue(self.stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to=to, content=content),
+                                              timeout=2).success)
+
+    def test_seqs_match_after_delete_and_snapshot_join(self):
+        """Change seqs are assigned by the leader, so a node joined from a snapshot logs the same ones."""
+        self.send("bob", "b1")
+        self.send("bob", "b2")
+        # The highest seq so far belongs to carol, so the snapshot no longer contains it.
+        self.send("carol", "c1")
+        self.stub.DeleteAccount(chat_pb2.DeleteAccountRequest(username="carol"), timeout=2)
+        self.cluster.join_node(3)
+        self.send("bob", "b3")
+        self.stub.ReadNewMessages(chat_pb2.ReadNewMessagesRequest(username="bob", count=1), timeout=2)
+        ids = [row[0] for row in self.query(1, "SELECT id FROM messages ORDER BY id")]
+        self.stub.DeleteMessages(chat_pb2.DeleteMessagesRequest(username="bob", message_ids=ids[1:2]), timeout=2)
+
+        changes = [self.query(i, "SELECT seq, message_id, recipient, deleted FROM message_changes ORDER BY seq")
+                   for i in (1, 2, 3)]
+        self.assertEqual(changes[0], changes[1])
+        self.assertEqual(changes[0], changes[2])
+        self.assertEqual([seq for seq, *_ in changes[0]], [4, 5, 6])
+        sequences = [self.query(i, "SELECT name, seq FROM sqlite_sequence ORDER BY name") for i in (1, 2, 3)]
+        self.assertEqual(sequences[0], sequences[2])
+
+    def test_read_new_messages_rejected_on_follower(self):
+        """Marking messages read is a write, so only the leader accepts ReadNewMessages."""
+        self.send("bob", "b1")
+        resp = self.cluster.client_stub(2).ReadNewMessages(chat_pb2.ReadNewMessagesRequest(username="bob"), timeout=2)
+        self.assertFalse(resp.success)
+        for index in (1, 2):
+            self.assertEqual(self.query(index, "SELECT read FROM messages"), [(0,)])
+            self.assertEqual(self.query(index, "SELECT seq FROM message_changes"), [(1,)])
+
+class TestLearnersAndSnapshots(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=2, spare=1).start()
+        self.addCleanup(self.cluster.close)
+        self.stub = self.cluster.client_stub(1)
+        for username in ("alice", "bob"):
+            self.stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"), timeout=2)
+        self.sent = 0
+
+    def send(self, count=1):
+        for _ in range(count):
+            self.assertTrue(self.stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to="bob",
+                                                                              content=f"m{self.sent}"),
+                                                  timeout=5).success)
+            self.sent += 1
+
+    def test_learner_catches_up_without_slowing_writes(self):
+        """A learner gets the writes made before and after it joins, but never sits on the write path."""
+        self.send(3)
+        learner = self.cluster.join_node(3, role="learner")
+        leader = self.cluster.service(1)
+        learner_address = self.cluster.addresses[2]
+        self.assertEqual(leader.learner_addresses, [learner_address])
+        self.assertNotIn(learner_address, leader.replica_addresses)
+        self.assertEqual(self.cluster.divergence(1, 3), 0)
+
+        self.cluster.network.add_latency(1.0, src=self.cluster.addresses[0], dst=learner_address,
+                                         methods=("ReplicateOperation",))
+        start = time.time()
+        self.send(5)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(self.cluster.wait_for_convergence(1, 3), 0)
+        self.assertEqual(learner.applied_index, leader.applied_index)
+        self.assertFalse(learner.is_leader)
+        self.assertTrue(learner.Election(chat_pb2.ElectionRequest(candidate_id=99), None).vote_granted)
+
+    def test_joiner_bootstraps_from_follower_snapshot(self):
+        """A joining voter loads a follower's snapshot and gets only the missing log entries from the leader."""
+        self.send(3)
+        leader_address, follower_address, joiner_address = self.cluster.addresses
+        # The follower misses the last two writes, so the leader must send them after the snapshot.
+        self.cluster.network.add_drop(1.0, src=leader_address, dst=follower_address, methods=("ReplicateOperation",))
+        self.send(2)
+        self.cluster.network.heal()
+        self.assertEqual(self.cluster.service(1).applied_index - self.cluster.service(2).applied_index, 2)
+
+        joiner = self.cluster.join_node(3)
+        calls = self.cluster.network.calls
+        self.assertEqual(calls[(joiner_address, follower_address, "GetSnapshot")], 1)
+        self.assertEqual(calls[(joiner_address, leader_address, "GetSnapshot")], 0)
+        self.assertEqual(joiner.applied_index, self.cluster.service(1).applied_index)
+        self.assertEqual(self.cluster.divergence(1, 3), 0)
+        self.assertIn(joiner_address, self.cluster.service(1).replica_addresses)
+
+    def test_voter_gap_is_filled_before_applying(self):
+        """A voter that missed a batch rejects the next one, and the leader resends what it missed first."""
+        leader_address, follower_address, _ = self.cluster.addresses
+        self.send(2)
+        self.cluster.network.add_drop(1.0, src=leader_address, dst=follower_address, methods=("ReplicateOperation",))
+        self.send()
+        self.cluster.network.heal()
+        self.assertEqual(self.cluster.divergence(1, 2), 1)
+        self.send()
+        self.assertEqual(self.cluster.divergence(1, 2), 0)
+        self.assertEqual(self.cluster.service(2).applied_index, self.cluster.service(1).applied_index)
+        self.assertEqual(self.cluster.service(1).metrics.get("replication_catchups", {"peer": follower_address}), 1)
+
+    def test_learner_index_mismatch_resends(self):
+        """A learner that restarts ahead of the leader's replication thread rejects its batch and is resent from its own index."""
+        self.cluster.join_node(3, role="learner")
+        self.send(2)
+        self.assertEqual(self.cluster.wait_for_convergence(1, 3), 0)
+        self.cluster.stop_node(3)
+        # The leader's thread for the learner keeps retrying the first of these batches.
+        self.send(2)
+        learner = self.cluster.join_node(3, role="learner")
+        self.assertEqual(learner.applied_index, self.cluster.service(1).applied_index)
+        self.send()
+        self.assertEqual(self.cluster.wait_for_convergence(1, 3), 0)
+        self.assertGreaterEqual(self.cluster.service(1).metrics.get(
+            "learner_resends", {"learner": self.cluster.addresses[2]}), 1)
+
+class TestListDb(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.conn = sqlite3.connect(os.path.join(self.tmp.name, "source.db"))
+        db_schema.create_schema(self.conn.cursor())
+        self.conn.executemany("INSERT INTO messages (sender, recipient, content, read, timestamp) VALUES (?, ?, ?, ?, ?)",
+                              [("a", "bob" if i % 3 else "carol", f"m{i}", i % 2, f"03/{10 + i % 5} 12:00")
+                               for i in range(25)])
+        # Rows as written before created_at and conversation existed.
+        db_schema.backfill_message_times(self.conn.cursor(), now=datetime.datetime(2026, 6, 1))
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def test_export_import_round_trip(self):
+        """Every format re-imports to identical rows, and import refuses a non-empty table."""
+        expected = self.conn.execute("SELECT * FROM messages ORDER BY id").fetchall()
+        formats = [f for f in list_db.FORMATS if f != "parquet" or list_db.pyarrow is not None]
+        for fmt in formats:
+            path = os.path.join(self.tmp.name, f"messages.{fmt}.gz" if fmt != "parquet" else "messages.parquet")
+            self.assertEqual(list_db.export_table(self.conn, "messages", fmt, path, batch_size=4), 25)
+            target = sqlite3.connect(os.path.join(self.tmp.name, f"{fmt}.db"))
+            self.assertEqual(list_db.import_table(target, "messages", fmt, path, batch_size=7), 25)
+            # Column affinity turns CSV text back into integers.
+            self.assertEqual(target.execute("SELECT * FROM messages ORDER BY id").fetchall(), expected, fmt)
+            with self.assertRaises(ValueError):
+                list_db.import_table(target, "messages", fmt, path)
+            target.close()
+
+    def test_round_trip_from_old_schema(self):
+        """Exports of a database from before content_hash/created_at/conversation import with those columns NULL."""
+        old = sqlite3.connect(os.path.join(self.tmp.name, "old.db"))
+        old.execute("CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, sender TEXT, recipient TEXT, "
+                    "content TEXT, read INTEGER DEFAULT 0, timestamp TEXT)")
+        old.executemany("INSERT INTO messages (sender, recipient, content, timestamp) VALUES ('a', 'b', ?, '03/10 12:00')",
+                        [(f"m{i}",) for i in range(5)])
+        old.commit()
+        expected = [row + (None, None, None) for row in old.execute("SELECT * FROM messages ORDER BY id")]
+        formats = [f for f in list_db.FORMATS if f != "parquet" or list_db.pyarrow is not None]
+        for fmt in formats:
+            path = os.path.join(self.tmp.name, f"old.{fmt}")
+            self.assertEqual(list_db.export_table(old, "messages", fmt, path, batch_size=2), 5)
+            target = sqlite3.connect(os.path.join(self.tmp.name, f"old_{fmt}.db"))
+            self.assertEqual(list_db.import_table(target, "messages", fmt, path, batch_size=3), 5)
+            self.assertEqual(target.execute("SELECT * FROM messages ORDER BY id").fetchall(), expected, fmt)
+            target.close()
+        old.close()
+
+    def test_export_filters(self):
+        """--recipient and --since/--until restrict the exported rows."""
+        path = os.path.join(self.tmp.name, "carol.jsonl")
+        count = list_db.export_table(self.conn, "messages", "jsonl", path, recipient="carol",
+                                     since=list_db.parse_time("2026-03-11"), until=list_db.parse_time("2026-03-14"))
+        expected = self.conn.execute("SELECT COUNT(*) FROM messages WHERE recipient='carol' "
+                                     "AND timestamp >= '03/11 00:00' AND timestamp < '03/14 00:00'").fetchone()[0]
+        self.assertEqual(count, expected)
+        self.assertGreater(count, 0)
+        with self.assertRaises(ValueError):
+            list_db.select_rows("accounts", recipient="carol")
+
+    def test_backfill_assumes_latest_past_year(self):
+        """Old rows get a conversation key and the most recent non-future year for their timestamp."""
+        self.conn.execute("INSERT INTO messages (sender, recipient, content, timestamp) VALUES ('z', 'b', 'x', '12/31 23:00')")
+        db_schema.backfill_message_times(self.conn.cursor(), now=datetime.datetime(2026, 6, 1))
+        created_at, conversation = self.conn.execute("SELECT created_at, conversation FROM messages "
+                                                     "WHERE sender='z'").fetchone()
+        self.assertEqual(datetime.datetime.fromtimestamp(created_at / 1000), datetime.datetime(2025, 12, 31, 23, 0))
+        self.assertEqual(conversation, db_schema.conversation_key("z", "b"))
+
+    def test_upgrade_runs_once_until_an_import(self):
+        """Startup backfills old rows once; an import makes the next start backfill again."""
+        insert = "INSERT INTO messages (sender, recipient, content, timestamp) VALUES (?, 'b', 'x', '01/02 10:00')"
+        missing = "SELECT COUNT(*) FROM messages WHERE created_at IS NULL"
+        self.conn.execute(insert, ("y",))
+        db_schema.upgrade_data(self.conn.cursor())
+        self.assertEqual(self.conn.execute(missing).fetchone()[0], 0)
+        self.conn.execute(insert, ("z",))
+        db_schema.upgrade_data(self.conn.cursor())
+        self.assertEqual(self.conn.execute(missing).fetchone()[0], 1)
+
+        path = os.path.join(self.tmp.name, "extra.jsonl")
+        with open(path, "w") as f:
+            f.write('{"id": 1000, "sender": "w", "recipient": "b", "content": "x", "timestamp": "01/03 10:00"}\n')
+        list_db.import_table(self.conn, "messages", "jsonl", path, append=True)
+        db_schema.upgrade_data(self.conn.cursor())
+        self.assertEqual(self.conn.execute(missing).fetchone()[0], 0)
+
+    def test_backfill_conversation_matches_non_ascii_key(self):
+        """Backfilled keys for non-ASCII usernames equal the ones new messages get."""
+        self.conn.execute("INSERT INTO messages (sender, recipient, content, timestamp) "
+                          "VALUES ('zoë', 'Ωmega', 'x', '01/02 10:00')")
+        db_schema.backfill_message_times(self.conn.cursor(), now=datetime.datetime(2026, 6, 1))
+        conversation, = self.conn.execute("SELECT conversation FROM messages WHERE sender='zoë'").fetchone()
+        self.assertEqual(conversation, db_schema.conversation_key("zoë", "Ωmega"))
+        self.assertEqual(conversation, db_schema.conversation_key("Ωmega", "zoë"))
+
+class TestServerFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_load_config_applies_flags_and_environment(self):
+        """Flags and environment variables override the config file, as for the script."""
+        path = os.path.join(self.tmp.name, "node.json")
+        with open(path, "w") as f:
+            f.write('{"server_id": 1, "server_port": 50051, "heartbeat_interval": 3}')
+        config = replicated_server.load_config(["--config", path, "--server_id", "4", "--join", "true"],
+                                               environ={"HEARTBEAT_INTERVAL": "1"})
+        self.assertEqual((config["server_id"], config["server_port"], config["heartbeat_interval"]), (4, 50051, 1))
+        self.assertTrue(config["join"])
+        self.assertEqual(config["db_file"], "chat_4.db")
+
+    def test_node_restarts_in_process(self):
+        """A node can be created, stopped and created again on the same port and database."""
+        port = free_port()
+        config = {"server_id": 1, "server_host": "127.0.0.1", "server_port": port, "initial_leader": True,
+                  "replica_addresses": [f"127.0.0.1:{port}"], "db_file": os.path.join(self.tmp.name, "chat.db")}
+        for username in ("alice", "bob"):
+            server, service = replicated_server.create_server(config)
+            replicated_server.start_server(server, service)
+            try:
+                with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+                    stub = chat_pb2_grpc.ChatServiceStub(channel)
+                    self.assertTrue(stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"),
+                                                       timeout=2).success)
+                    accounts = stub.ListAccounts(chat_pb2.ListAccountsRequest(username=username), timeout=2).accounts
+            finally:
+                replicated_server.stop_server(server, service, grace=0)
+        self.assertEqual(sorted(accounts), ["alice", "bob"])
+
+class TestReadWorkers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        port = free_port()
+        self.config = {"server_id": 1, "server_host": "127.0.0.1", "server_port": port, "initial_leader": True,
+                       "replica_addresses": [f"127.0.0.1:{port}"], "workers": 2,
+                       "db_file": os.path.join(self.tmp.name, "chat.db"),
+                       "worker_socket": os.path.join(self.tmp.name, "chat.sock")}
+
+    def test_worker_serves_reads_and_forwards_writes(self):
+        """A read worker answers reads from the shared database and forwards writes to the primary."""
+        server, service = replicated_server.create_server(self.config)
+        replicated_server.start_server(server, service)
+        self.addCleanup(replicated_server.stop_server, server, service, 0)
+        # The worker gets its own port here so every call is known to reach it.
+        worker_port = free_port()
+        worker = replicated_server.ReadWorkerService(self.config)
+        worker_server = replicated_server.build_grpc_server(self.config, worker.metrics)
+        chat_pb2_grpc.add_ChatServiceServicer_to_server(worker, worker_server)
+        worker_server.add_insecure_port(f"127.0.0.1:{worker_port}")
+        worker_server.start()
+        self.addCleanup(lambda: worker_server.stop(0).wait())
+
+        with grpc.insecure_channel(f"127.0.0.1:{worker_port}") as channel:
+            stub = chat_pb2_grpc.ChatServiceStub(channel)
+            for username in ("alice", "bob"):
+                self.assertTrue(stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"),
+                                                   timeout=2).success)
+            self.assertTrue(stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to="bob", content="hi"),
+                                             timeout=2).success)
+            self.assertEqual(stub.Login(chat_pb2.LoginRequest(username="bob", password="pw"),
+                                        timeout=2).unread_count, 1)
+            self.assertEqual(len(stub.ReadNewMessages(chat_pb2.ReadNewMessagesRequest(username="bob"),
+                                                      timeout=2).messages), 1)
+            self.assertEqual(len(stub.ListMessages(chat_pb2.ListMessagesRequest(username="bob"),
+                                                   timeout=2).messages), 1)
+            leader = stub.GetLeaderInfo(chat_pb2.GetLeaderInfoRequest(), timeout=2)
+        self.assertEqual(leader.leader_address, service.my_address)
+        self.assertEqual(service.applied_index, 4)
+
+    def port_in_use(self):
+        # A plain bind fails while any process of the node still holds the port with SO_REUSEPORT.
+        with socket.socket() as s:
+            try:
+                s.bind(("127.0.0.1", self.config["server_port"]))
+            except OSError:
+                return True
+            return False
+
+    def test_workers_exit_with_primary(self):
+        """Killing the primary process also stops its read workers and frees the port."""
+        config_path = os.path.join(self.tmp.name, "config.json")
+        with open(config_path, "w") as f:
+            json.dump(self.config, f)
+        env = dict(os.environ, PYTHONUNBUFFERED="1", DB_FILE=self.config["db_file"])
+        proc = subprocess.Popen([sys.executable, os.path.abspath(replicated_server.__file__), "--config", config_path],
+                                cwd=self.tmp.name, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, start_new_session=True)
+        def kill_group():
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            proc.wait()
+            proc.stdout.close()
+        self.addCleanup(kill_group)
+        for line in proc.stdout:
+            if line.startswith("Read worker 1 started"):
+                break
+        self.assertTrue(self.port_in_use())
+
+        proc.kill()
+        proc.wait()
+        deadline = time.time() + 10
+        while self.port_in_use() and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(self.port_in_use())
+
+class TestBlobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=2, config={"blob_threshold": 100}).start()
+        self.addCleanup(self.cluster.close)
+        self.stub = self.cluster.client_stub(1)
+        for username in ("alice", "bob", "carol"):
+            self.stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"), timeout=2)
+        self.body = "log line\n" * 50
+
+    def blobs(self, index):
+        conn = sqlite3.connect(self.cluster.node_config(index)["db_file"])
+        try:
+            return conn.execute("SELECT hash, refcount FROM blobs").fetchall()
+        finally:
+            conn.close()
+
+    def send(self, to):
+        self.assertTrue(self.stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to=to, content=self.body),
+                                              timeout=2).success)
+
+    def test_large_bodies_stored_once_and_released(self):
+        """A body sent to two users is stored once per node, previewed on sync, and freed on delete."""
+        self.send("bob")
+        self.send("carol")
+        for index in (1, 2):
+            self.assertEqual([refcount for _, refcount in self.blobs(index)], [2])
+        # The second message reached the follower without its body.
+        self.assertGreater(sum(v for k, v in self.cluster.service(1).metrics.snapshot().items()
+                               if k.startswith("replication_blob_bytes_skipped")), len(self.body))
+
+        follower = self.cluster.client_stub(2)
+        synced = follower.SyncMessages(chat_pb2.SyncMessagesRequest(username="bob", preview_length=20), timeout=2)
+        message = synced.messages[0]
+        self.assertEqual((message.content, message.truncated), (self.body[:20], True))
+        self.assertEqual(follower.GetBlob(chat_pb2.GetBlobRequest(hash=message.content_hash), timeout=2).content,
+                         self.body)
+        self.assertEqual(self.stub.ReadNewMessages(chat_pb2.ReadNewMessagesRequest(username="carol"),
+                                                   timeout=2).messages[0].split(" - ", 2)[2], self.body)
+
+        self.stub.DeleteMessages(chat_pb2.DeleteMessagesRequest(username="bob", message_ids=[message.id]), timeout=2)
+        self.assertEqual([refcount for _, refcount in self.blobs(2)], [1])
+        self.stub.DeleteAccount(chat_pb2.DeleteAccountRequest(username="carol"), timeout=2)
+        self.assertEqual(self.blobs(1), [])
+        self.assertEqual(self.blobs(2), [])
+
+    def test_follower_missing_blob_gets_body(self):
+        """A follower that no longer has a blob the leader thinks it has is sent the body on retry."""
+        self.send("bob")
+        self.stub.DeleteAccount(chat_pb2.DeleteAccountRequest(username="bob"), timeout=2)
+        self.assertEqual(self.blobs(2), [])
+        self.send("carol")
+        self.assertEqual([refcount for _, refcount in self.blobs(2)], [1])
+        self.assertEqual(self.cluster.service(1).metrics.get(
+            "replication_missing_blobs", {"peer": self.cluster.addresses[1]}), 1)
+        self.assertEqual(self.cluster.divergence(1, 2), 0)
+
+class TestConversation(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=2).start()
+        self.addCleanup(self.cluster.close)
+        stub = self.cluster.client_stub(1)
+        for username in ("alice", "bob", "carol"):
+            stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"), timeout=2)
+        self.sent = []
+        for i in range(8):
+            sender, to = ("alice", "bob") if i % 2 else ("bob", "alice")
+            stub.SendMessage(chat_pb2.SendMessageRequest(sender=sender, to=to, content=f"c{i}"), timeout=2)
+            stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to="carol", content=f"other{i}"), timeout=2)
+            self.sent.append(f"c{i}")
+
+    def test_pages_back_through_both_directions(self):
+        """Pages go from newest to oldest, each ordered by time, covering both senders once."""
+        stub = self.cluster.client_stub(2)
+        pages, before, before_id = [], 0, 0
+        while True:
+            resp = stub.GetConversation(chat_pb2.GetConversationRequest(user="bob", peer="alice", before=before,
+                                                                        before_id=before_id, limit=3), timeout=2)
+            self.assertTrue(resp.success)
+            pages.append([m.content for m in resp.messages])
+            times = [m.created_at for m in resp.messages]
+            self.assertEqual(times, sorted(times))
+            if not resp.has_more:
+                break
+            before, before_id = resp.next_before, resp.next_before_id
+        self.assertEqual([len(p) for p in pages], [3, 3, 2])
+        self.assertEqual([c for page in reversed(pages) for c in page], self.sent)
+
+    def test_replicas_store_same_time_and_key(self):
+        """created_at and the conversation key are assigned by the leader and replicated as-is."""
+        rows = []
+        for index in (1, 2):
+            conn = sqlite3.connect(self.cluster.node_config(index)["db_file"])
+            rows.append(conn.execute("SELECT id, created_at, conversation FROM messages ORDER BY id").fetchall())
+            conn.close()
+        self.assertEqual(rows[0], rows[1])
+        self.assertEqual(rows[0][0][2], db_schema.conversation_key("alice", "bob"))
+
+class TestTracing(unittest.TestCase):
+
+    def test_db_spans_recorded_for_active_trace(self):
+        """Traced connections record execute/commit spans only while a trace is active."""
+        conn = tracing.TracedConnection(sqlite3.connect(":memory:"))
+        conn.cursor().execute("CREATE TABLE t (x INTEGER)")
+        trace = tracing.Trace("abc", "SendMessage", time.perf_counter())
+        tracing._current.trace = trace
+        try:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO t VALUES (1)")
+            conn.commit()
+            with tracing.span("replicate 127.0.0.1:50052"):
+                pass
+            self.assertEqual(tracing.outgoing_metadata(), (("x-trace-id", "abc"),))
+        finally:
+            tracing._current.trace = None
+        self.assertEqual([name for name, _, _ in trace.spans],
+                         ["db.execute INSERT", "db.commit", "replicate 127.0.0.1:50052"])
+        self.assertIn("db.commit=", trace.breakdown())
+        self.assertEqual(tracing.outgoing_metadata(), ())
+
+    def test_stack_sampler_writes_collapsed_stacks(self):
+        """Stopping the sampler writes a collapsed-stack profile of running threads."""
+        with tempfile.TemporaryDirectory() as tmp:
+            sampler = profiler.StackSampler(tmp, "test")
+            self.assertTrue(sampler.start(interval=0.001))
+            self.assertFalse(sampler.start())
+            time.sleep(0.05)
+            path = sampler.stop()
+            self.assertIsNone(sampler.stop())
+            with open(path) as f:
+                lines = f.read().splitlines()
+            self.assertTrue(lines)
+            self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+            self.assertEqual(os.path.dirname(path), tmp)
+
+class TestPayloadCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        """Every available encoding decodes back to the original payload."""
+        data = b'{"sender": "a", "content": "' + b"x" * 4096 + b'"}'
+        for encoding in payload_codec.available_encodings():
+            encoded = payload_codec.compress(data, encoding)
+            self.assertEqual(payload_codec.decompress(encoded, encoding), data)
+            if encoding != payload_codec.IDENTITY:
+                self.assertLess(len(encoded), len(data))
+
+    def test_negotiate_falls_back_to_peer_encoding(self):
+        """A peer that cannot decode the preferred codec gets one it advertised."""
+        self.assertEqual(payload_codec.negotiate("zlib", ["zlib", "identity"]), "zlib")
+        self.assertEqual(payload_codec.negotiate("zlib", ["identity"]), "identity")
+        self.assertEqual(payload_codec.negotiate("none", ["zlib"]), "identity")
+        with self.assertRaises(ValueError):
+            payload_codec.resolve_encoding("brotli")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,140 @@
+import time
+import unittest
+
+import chat_pb2
+from cluster_harness import CLIENT, LocalCluster, Writer
+
+
+class FailoverTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.cluster = LocalCluster(size=3, config=self.config).start()
+        self.addCleanup(self.cluster.close)
+        stub = self.cluster.client_stub(1)
+        for username in ("alice", "bob"):
+            self.assertTrue(stub.CreateAccount(chat_pb2.CreateAccountRequest(username=username, password="pw"),
+                                               timeout=2).success)
+        self.timings = self.cluster.base_config
+
+    def election_bound(self):
+        # Lease expiry, the next lease check, the election backoff, and one Election RPC per voter
+        # that may time out, plus scheduling slack.
+        t = self.timings
+        return (t["lease_timeout"] + t["election_tick"] + t["election_backoff"]
+                + len(self.cluster.addresses) * t["peer_rpc_timeout"] + 1.0)
+
+    def report(self, name, **values):
+        print(f"[failover] {name}: " + " ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                                for k, v in values.items()))
+
+
+class TestLeaderFailover(FailoverTestCase):
+
+    def test_leader_crash(self):
+        """After the leader dies, the lowest surviving id leads within the bound and no acknowledged write is lost."""
+        writer = Writer(self.cluster, "alice", "bob").start()
+        time.sleep(0.5)
+        fault_time = time.time()
+        self.cluster.stop_node(1)
+        leader, time_to_leader = self.cluster.wait_for_leader()
+        time.sleep(0.5)
+        writer.stop()
+        unavailable = writer.unavailability(fault_time)
+        contents = {row[3] for row in self.cluster.messages(leader)}
+        lost = [content for _, content in writer.acked if content not in contents]
+        divergence = self.cluster.wait_for_convergence(2, 3)
+        self.report("leader_crash", time_to_leader=time_to_leader, unavailable=unavailable,
+                    acked=len(writer.acked), lost=len(lost), divergence=divergence)
+
+        self.assertEqual(leader, 2)
+        self.assertLess(time_to_leader, self.election_bound())
+        self.assertLess(unavailable, self.election_bound() + len(self.cluster.addresses) * writer.timeout)
+        self.assertEqual(lost, [])
+        # A write the old leader replicated to only one follower before dying reaches the other
+        # through the new leader's catch-up.
+        self.assertEqual(divergence, 0)
+
+    def test_partitioned_leader(self):
+        """A leader cut off from the majority is replaced, and steps down and reloads the majority's state when the partition heals."""
+        leader_address, *majority = self.cluster.addresses
+        # Replication to the cut-off node blocks each write for peer_rpc_timeout, so the client
+        # must wait longer than that.
+        writer = Writer(self.cluster, "alice", "bob",
+                        timeout=len(majority) * self.timings["peer_rpc_timeout"] + 0.5).start()
+        time.sleep(0.5)
+        fault_time = time.time()
+        self.cluster.network.partition([leader_address], majority + [CLIENT])
+        leader, time_to_leader = self.cluster.wait_for_leader(among=(2, 3))
+        time.sleep(2 * writer.timeout)
+        writer.stop()
+        unavailable = writer.unavailability(fault_time)
+        majority_divergence = self.cluster.wait_for_convergence(2, 3)
+
+        self.cluster.network.heal()
+        final_leader, time_to_converge = self.cluster.wait_for_leader()
+        # The old leader missed the majority's writes and reloads the new leader's state.
+        old_leader_divergence = self.cluster.wait_for_convergence(1, 2)
+        self.report("partitioned_leader", time_to_leader=time_to_leader, unavailable=unavailable,
+                    acked_during_partition=len([t for t, _ in writer.acked if t > fault_time]),
+                    time_to_converge=time_to_converge, majority_divergence=majority_divergence,
+                    old_leader_divergence=old_leader_divergence)
+
+        self.assertEqual(leader, 2)
+        self.assertLess(time_to_leader, self.election_bound())
+        self.assertLess(unavailable, self.election_bound() + len(self.cluster.addresses) * writer.timeout)
+        # A write in flight on the old leader when the partition started may have reached only
+        # one follower; the new leader's catch-up brings the other one level.
+        self.assertEqual(majority_divergence, 0)
+        # The majority kept taking writes, so its leader has the higher index and stays.
+        self.assertEqual(final_leader, 2)
+        self.assertLess(time_to_converge, self.timings["heartbeat_interval"]
+                        + len(self.cluster.addresses) * self.timings["peer_rpc_timeout"] + 1.0)
+        self.assertEqual(old_leader_divergence, 0)
+        self.assertEqual(self.cluster.service(1).applied_index, self.cluster.service(2).applied_index)
+        # The old leader follows again: a new write reaches it without id clashes.
+        self.assertTrue(self.cluster.client_stub(2).SendMessage(
+            chat_pb2.SendMessageRequest(sender="alice", to="bob", content="after heal"), timeout=5).success)
+        self.assertEqual(self.cluster.wait_for_convergence(1, 2), 0)
+        self.assertEqual(self.cluster.divergence(1, 3), 0)
+
+
+class TestLossyHeartbeats(FailoverTestCase):
+    config = {"lease_timeout": 2.0, "peer_rpc_timeout": 0.2}
+
+    def test_heartbeat_loss_below_lease_keeps_leader(self):
+        """Losing 30% of heartbeats does not cause an election while the lease still covers the gaps."""
+        self.cluster.network.add_drop(0.3, methods=("Heartbeat",))
+        time.sleep(4)
+        self.report("lossy_heartbeats", dropped=self.cluster.network.dropped,
+                    leader_terms=[self.cluster.service(i).leader_term for i in (1, 2, 3)])
+        self.assertGreater(self.cluster.network.dropped, 0)
+        self.assertEqual(self.cluster.leaders(), [1])
+        self.assertEqual([self.cluster.service(i).leader_term for i in (1, 2, 3)], [1, 0, 0])
+
+
+class TestSlowLinks(FailoverTestCase):
+    latency = 0.05
+
+    def test_slow_links_keep_replicas_identical(self):
+        """With added latency on every peer link, writes stay within the bound and replicas match."""
+        for address in self.cluster.addresses:
+            self.cluster.network.add_latency(self.latency, src=address)
+        stub = self.cluster.client_stub(1)
+        durations = []
+        for i in range(20):
+            start = time.time()
+            self.assertTrue(stub.SendMessage(chat_pb2.SendMessageRequest(sender="alice", to="bob", content=f"m{i}"),
+                                             timeout=5).success)
+            durations.append(time.time() - start)
+        durations.sort()
+        followers = len(self.cluster.addresses) - 1
+        self.report("slow_links", median_write=durations[len(durations) // 2], max_write=durations[-1],
+                    divergence=self.cluster.divergence(1, 2) + self.cluster.divergence(1, 3))
+        self.assertLess(durations[len(durations) // 2], followers * self.latency + 0.5)
+        self.assertEqual(self.cluster.divergence(1, 2), 0)
+        self.assertEqual(self.cluster.divergence(1, 3), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
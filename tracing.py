@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import grpc
+
+TRACE_METADATA_KEY = "x-trace-id"
+
+_current = threading.local()
+
+
+class Trace:
+    def __init__(self, trace_id, method, arrived):
+        self.trace_id = trace_id
+        self.method = method
+        self.arrived = arrived
+        self.spans = []
+
+    def add(self, name, start, duration):
+        self.spans.append((name, start, duration))
+
+    def breakdown(self):
+        # Total time and call count per span name, in first-seen order.
+        totals = {}
+        for name, _, duration in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+        parts = []
+        for name, (total, count) in totals.items():
+            suffix = f" x{count}" if count > 1 else ""
+            parts.append(f"{name}={total * 1000:.1f}ms{suffix}")
+        return " ".join(parts)
+
+
+def current_trace():
+    return getattr(_current, "trace", None)
+
+
+def outgoing_metadata():
+    # Propagates the trace id to peers, e.g. on ReplicateOperation calls.
+    trace = current_trace()
+    return ((TRACE_METADATA_KEY, trace.trace_id),) if trace else ()
+
+
+@contextmanager
+def span(name):
+    trace = current_trace()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter() - start)
+
+
+class TracedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, parameters=()):
+        with span("db.execute " + sql.split(None, 1)[0].upper()):
+            self._cursor.execute(sql, parameters)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        with span("db.execute " + sql.split(None, 1)[0].upper()):
+            self._cursor.executemany(sql, seq_of_parameters)
+        return self
+
+    def fetchone(self):
+        with span("db.fetch"):
+            return self._cursor.fetchone()
+
+    def fetchall(self):
+        with span("db.fetch"):
+            return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """sqlite3 connection proxy that records db spans for the RPC being traced."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return TracedCursor(self._conn.cursor())
+
+    def commit(self):
+        with span("db.commit"):
+            self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+    """Assigns a trace id to every unary RPC and logs those slower than `slow_request_ms`.
+
+    intercept_service runs when the call arrives, before it waits for a worker thread, so the
+    gap until the handler starts is recorded as the queue_wait span.
+    """
+
+    def __init__(self, config, metrics):
+        self.metrics = metrics
+        self.slow_request_s = config.get("slow_request_ms", 200) / 1000.0
+
+    def intercept_service(self, continuation, handler_call_details):
+        arrived = time.perf_counter()
+        handler = continuation(handler_call_details)
+        if handler is None or handler.unary_unary is None:
+            return handler
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        metadata = dict(handler_call_details.invocation_metadata or ())
+        trace_id = metadata.get(TRACE_METADATA_KEY) or uuid.uuid4().hex[:16]
+        behavior = handler.unary_unary
+
+        def wrapper(request, context):
+            trace = Trace(trace_id, method, arrived)
+            started = time.perf_counter()
+            trace.add("queue_wait", arrived, started - arrived)
+            _current.trace = trace
+            try:
+                return behavior(request, context)
+            finally:
+                _current.trace = None
+                self.finish(trace)
+
+        return grpc.unary_unary_rpc_method_handler(
+            wrapper,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
+
+    def finish(self, trace):
+        total = time.perf_counter() - trace.arrived
+        if total >= self.slow_request_s:
+            self.metrics.inc("rpc_slow_total", {"method": trace.method})
+            logging.warning(f"[Slow RPC] {trace.method} trace={trace.trace_id} total={total * 1000:.1f}ms "
+                            f"{trace.breakdown()}")